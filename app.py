@@ -7,287 +7,2283 @@ as if they were an AI agent. Provides a chat-like terminal interface.
 
 from fasthtml.common import *
 import requests
+import aiohttp
+from requests.adapters import HTTPAdapter
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import gzip
+import hashlib
 import json
+import mmap
 import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.routing import Route
 
-# Moltbook API configuration
-API_BASE = "https://www.moltbook.com/api/v1"
+# Moltbook API configuration (override to point at a local fake API)
+API_BASE = os.environ.get('MOLTBOOK_API_BASE', "https://www.moltbook.com/api/v1")
 
 # Simple file-based storage for API key
 CONFIG_FILE = os.path.expanduser("~/.config/moltbook/credentials.json")
+# Local mirror of everything the API has shown us
+MIRROR_FILE = os.environ.get('MOLTBOOK_MIRROR', os.path.expanduser("~/.config/moltbook/mirror.db"))
+# Terminal history kept across restarts
+HISTORY_DIR = os.environ.get('MOLTBOOK_HISTORY', os.path.expanduser("~/.config/moltbook/history"))
+# Journal of posts and comments waiting to be sent
+OUTBOX_FILE = os.environ.get('MOLTBOOK_OUTBOX', os.path.expanduser("~/.config/moltbook/outbox.db"))
 
-def load_api_key():
-    """Load API key from config file"""
-    if os.path.exists(CONFIG_FILE):
+class CredentialStore:
+    """Parsed credentials file cached in memory, revalidated with a cheap stat().
+
+    Saves go to a temp file that is renamed over the original, so a concurrent
+    load sees either the old or the new file, never a partial write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path = None
+        self._stamp = None
+        self._data = {}
+
+    def load(self, path):
+        """Return the credentials dict for path ({} if missing or unreadable)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {}
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            if path == self._path and stamp == self._stamp:
+                return self._data
         try:
-            with open(CONFIG_FILE, 'r') as f:
+            with open(path, 'r') as f:
                 data = json.load(f)
-                return data.get('api_key', '')
-        except:
-            pass
-    return ''
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        with self._lock:
+            self._path, self._stamp, self._data = path, stamp, data
+        return data
+
+    def save(self, path, data):
+        """Atomically replace the file at path with data"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.credentials-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+        st = os.stat(path)
+        with self._lock:
+            self._path, self._stamp, self._data = path, (st.st_mtime_ns, st.st_size, st.st_ino), dict(data)
+
+credential_store = CredentialStore()
+
+def load_api_key():
+    """Load API key from config file"""
+    return credential_store.load(CONFIG_FILE).get('api_key', '')
 
 def save_api_key(api_key, agent_name=''):
     """Save API key to config file"""
-    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump({'api_key': api_key, 'agent_name': agent_name}, f)
+    credential_store.save(CONFIG_FILE, {'api_key': api_key, 'agent_name': agent_name})
+
+# HTTP client tuning: one pooled keep-alive session per API key
+POOL_MAXSIZE = 10
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses that mean the server did not process the request, so even writes are safe to resend
+RETRY_ANY_METHOD_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {'GET', 'DELETE'}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(api_key):
+    """Get (or create) the shared keep-alive session for an API key"""
+    with _sessions_lock:
+        session = _sessions.get(api_key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Authorization': f'Bearer {api_key}',
+                'Content-Type': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+            })
+            _sessions[api_key] = session
+        return session
+
+def close_sessions():
+    """Close all pooled sessions (e.g. on shutdown)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (0-based), using full jitter"""
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def should_retry(method, status_code):
+    """Whether a response status is worth retrying for this method"""
+    if status_code in RETRY_ANY_METHOD_STATUSES:
+        return True
+    return status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS
+
+def _send_request(method, endpoint, api_key, data=None):
+    """Send one request over the pooled session, retrying per the backoff policy"""
+    session = get_session(api_key)
+    url = f"{API_BASE}{endpoint}"
+    body = data if method in ('POST', 'PATCH') else None
+    key = cache_key(api_key, endpoint) if method == 'GET' else None
+    validators = conditional_cache.validators(key) if key else None
+    attempt = 0
+    status = 'error'
+    start = time.perf_counter()
+    try:
+        while True:
+            try:
+                resp = session.request(method, url, json=body, timeout=30, headers=validators)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                status = 'error'
+                if method in IDEMPOTENT_METHODS and attempt < MAX_RETRIES:
+                    time.sleep(retry_delay(attempt))
+                    attempt += 1
+                    continue
+                return {'error': str(e)}
+            except requests.exceptions.RequestException as e:
+                status = 'error'
+                return {'error': str(e)}
+            status = resp.status_code
+
+            if should_retry(method, resp.status_code) and attempt < MAX_RETRIES:
+                delay = retry_delay(attempt, parse_retry_after(resp.headers.get('Retry-After')))
+                if resp.status_code == 429 and method not in ('GET',):
+                    write_scheduler.pause(api_key, endpoint, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if key and resp.status_code == 304:
+                stored = conditional_cache.not_modified(key)
+                if stored is not None:
+                    return stored
+                validators = None  # the stored body is gone; ask again unconditionally
+                continue
+
+            try:
+                result = resp.json()
+            except (json.JSONDecodeError, ValueError):
+                return {'error': 'Invalid JSON response', 'raw': resp.text[:500]}
+            if key:
+                conditional_cache.store(key, resp.status_code, resp.headers, result, len(resp.content))
+            return result
+    finally:
+        metrics.observe_upstream(method, endpoint, status, time.perf_counter() - start, attempt)
+
+# Async client: one pooled aiohttp session per API key and event loop
+_async_clients = {}
+
+def get_async_client(api_key):
+    """Get (or create) the shared async session for an API key on the running loop"""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(api_key)
+    if entry is None or entry[0] is not loop or entry[1].closed:
+        client = aiohttp.ClientSession(
+            headers={
+                'Authorization': f'Bearer {api_key}',
+                'Content-Type': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+            },
+            connector=aiohttp.TCPConnector(limit=POOL_MAXSIZE),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+        entry = _async_clients[api_key] = (loop, client)
+    return entry[1]
+
+async def aclose_async_clients():
+    """Close the async sessions that belong to the running loop"""
+    loop = asyncio.get_running_loop()
+    for api_key, (client_loop, client) in list(_async_clients.items()):
+        if client_loop is loop:
+            await client.close()
+            del _async_clients[api_key]
+
+async def _asend_request(method, endpoint, api_key, data=None, headers=None):
+    """Async counterpart of _send_request"""
+    client = get_async_client(api_key)
+    url = f"{API_BASE}{endpoint}"
+    body = data if method in ('POST', 'PATCH') else None
+    key = cache_key(api_key, endpoint) if method == 'GET' else None
+    validators = conditional_cache.validators(key) if key else None
+    attempt = 0
+    status = 'error'
+    start = time.perf_counter()
+    try:
+        while True:
+            try:
+                async with client.request(method, url, json=body, headers={**(headers or {}), **(validators or {})}) as resp:
+                    status, resp_headers = resp.status, resp.headers
+                    if should_retry(method, resp.status) and attempt < MAX_RETRIES:
+                        delay = retry_delay(attempt, parse_retry_after(resp.headers.get('Retry-After')))
+                        if resp.status == 429 and method != 'GET':
+                            write_scheduler.pause(api_key, endpoint, delay)
+                    else:
+                        delay = None
+                        text = await resp.text()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                status = 'error'
+                if method in IDEMPOTENT_METHODS and attempt < MAX_RETRIES:
+                    await asyncio.sleep(retry_delay(attempt))
+                    attempt += 1
+                    continue
+                return {'error': str(e) or type(e).__name__}
+            except aiohttp.ClientError as e:
+                status = 'error'
+                return {'error': str(e) or type(e).__name__}
+
+            if delay is not None:
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if key and status == 304:
+                stored = conditional_cache.not_modified(key)
+                if stored is not None:
+                    return stored
+                validators = None  # the stored body is gone; ask again unconditionally
+                continue
+
+            try:
+                result = json.loads(text)
+            except json.JSONDecodeError:
+                return {'error': 'Invalid JSON response', 'raw': text[:500]}
+            if key:
+                conditional_cache.store(key, status, resp_headers, result, len(text))
+            return result
+    finally:
+        metrics.observe_upstream(method, endpoint, status, time.perf_counter() - start, attempt)
+
+# Instrumentation: latency histograms and counters, exported at /metrics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upstream paths are reported by template so ids do not explode the label space
+PATH_TEMPLATES = [
+    (re.compile(r'^/posts/[^/]+'), '/posts/{id}'),
+    (re.compile(r'^/agents/(?!(me|status|profile|register)$)[^/]+'), '/agents/{name}'),
+    (re.compile(r'^/submolts/[^/]+'), '/submolts/{name}'),
+]
+
+def template_path(endpoint):
+    """'/posts/abc123/upvote?x=1' -> '/posts/{id}/upvote'"""
+    path = endpoint.split('?', 1)[0]
+    for pattern, template in PATH_TEMPLATES:
+        path, n = pattern.subn(template, path, count=1)
+        if n:
+            break
+    return path
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+class Metrics:
+    """Counters and histograms keyed by label tuples, behind one lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.upstream_latency = {}   # (method, path) -> Histogram
+            self.upstream_requests = {}  # (method, path, status) -> count
+            self.upstream_retries = {}   # (method, path) -> count
+            self.route_latency = {}      # (method, route) -> Histogram
+            self.route_requests = {}     # (method, route, status) -> count
+
+    def observe_upstream(self, method, endpoint, status, seconds, retries):
+        path = template_path(endpoint)
+        with self._lock:
+            hist = self.upstream_latency.get((method, path))
+            if hist is None:
+                hist = self.upstream_latency[(method, path)] = Histogram()
+            hist.observe(seconds)
+            key = (method, path, str(status))
+            self.upstream_requests[key] = self.upstream_requests.get(key, 0) + 1
+            if retries:
+                self.upstream_retries[(method, path)] = self.upstream_retries.get((method, path), 0) + retries
+
+    def observe_route(self, method, route, status, seconds):
+        with self._lock:
+            hist = self.route_latency.get((method, route))
+            if hist is None:
+                hist = self.route_latency[(method, route)] = Histogram()
+            hist.observe(seconds)
+            key = (method, route, str(status))
+            self.route_requests[key] = self.route_requests.get(key, 0) + 1
+
+    def snapshot(self):
+        """Copies of every series, safe to format outside the lock"""
+        with self._lock:
+            latency = {}
+            for name in ('upstream_latency', 'route_latency'):
+                latency[name] = {}
+                for k, h in getattr(self, name).items():
+                    c = Histogram()
+                    c.counts, c.sum, c.count = list(h.counts), h.sum, h.count
+                    latency[name][k] = c
+            return {**latency, 'upstream_requests': dict(self.upstream_requests),
+                    'upstream_retries': dict(self.upstream_retries), 'route_requests': dict(self.route_requests)}
+
+metrics = Metrics()
+
+def prom_labels(**labels):
+    return '{' + ','.join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                          for k, v in labels.items()) + '}'
+
+def prom_histogram(lines, name, help_text, series, label_names):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, hist in sorted(series.items()):
+        labels = dict(zip(label_names, key))
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float('inf'),), hist.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{prom_labels(**labels, le="+Inf" if bound == float("inf") else bound)} {cumulative}')
+        lines.append(f'{name}_sum{prom_labels(**labels)} {hist.sum}')
+        lines.append(f'{name}_count{prom_labels(**labels)} {hist.count}')
+
+def prom_counter(lines, name, help_text, series, label_names, kind='counter'):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for key, value in sorted(series.items()):
+        lines.append(f'{name}{prom_labels(**dict(zip(label_names, key)))} {value}')
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    snap = metrics.snapshot()
+    lines = []
+    prom_histogram(lines, 'moltbook_upstream_request_duration_seconds', 'Moltbook API call latency, retries included',
+                   snap['upstream_latency'], ('method', 'endpoint'))
+    prom_counter(lines, 'moltbook_upstream_requests_total', 'Moltbook API calls by final status',
+                 snap['upstream_requests'], ('method', 'endpoint', 'status'))
+    prom_counter(lines, 'moltbook_upstream_retries_total', 'Moltbook API retries',
+                 snap['upstream_retries'], ('method', 'endpoint'))
+    prom_histogram(lines, 'moltbook_http_request_duration_seconds', 'Time to first byte of app routes',
+                   snap['route_latency'], ('method', 'route'))
+    prom_counter(lines, 'moltbook_http_requests_total', 'App requests by status',
+                 snap['route_requests'], ('method', 'route', 'status'))
+    cache, cond, flights = response_cache.stats(), conditional_cache.stats(), single_flight.stats()
+    prom_counter(lines, 'moltbook_cache_lookups_total', 'Response cache lookups',
+                 {('hit',): cache['hits'], ('miss',): cache['misses']}, ('result',))
+    prom_counter(lines, 'moltbook_cache_entries', 'Response cache entries', {(): cache['entries']}, (), 'gauge')
+    prom_counter(lines, 'moltbook_conditional_requests_total', 'GETs sent with validators, by outcome',
+                 {('not_modified',): cond['not_modified'], ('modified',): cond['conditional'] - cond['not_modified']},
+                 ('result',))
+    prom_counter(lines, 'moltbook_conditional_bytes_saved_total', 'Response bytes not downloaded thanks to 304s',
+                 {(): cond['bytes_saved']}, ())
+    prom_counter(lines, 'moltbook_singleflight_coalesced_total', 'Reads that shared an in-flight call',
+                 {(): flights['coalesced']}, ())
+    return '\n'.join(lines) + '\n'
+
+class MetricsMiddleware:
+    """Times every HTTP request to its first response byte, labelled by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        recorded = False
+
+        async def send_timed(message):
+            nonlocal recorded
+            if message['type'] == 'http.response.start' and not recorded:
+                recorded = True
+                route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+                metrics.observe_route(scope['method'], route, message['status'], time.perf_counter() - start)
+            await send(message)
+
+        await self.app(scope, receive, send_timed)
+
+# Response cache for GETs: TTL per endpoint, LRU-bounded by entries and bytes
+CACHE_MAX_ENTRIES = 512
+CACHE_MAX_BYTES = 8 * 1024 * 1024
+# First matching path prefix wins; 0 disables caching
+CACHE_TTLS = [
+    ('/agents/status', 0),
+    ('/agents/me', 30),
+    ('/agents/profile', 60),
+    ('/submolts', 300),
+    ('/search', 60),
+    ('/posts', 15),
+]
+# Writes under a top-level resource invalidate cached reads under these prefixes
+CACHE_INVALIDATES = {
+    'posts': ('/posts', '/search', '/agents'),
+    'agents': ('/agents',),
+    'submolts': ('/submolts',),
+}
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of decoded API responses"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value, ttl, size):
+        """Store value for ttl seconds, evicting least recently used entries to fit"""
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, api_key, prefixes):
+        """Drop every entry for api_key whose path starts with one of prefixes"""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == api_key and k[1].startswith(prefixes)]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Snapshot of cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries), 'bytes': self.bytes,
+                'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions, 'invalidations': self.invalidations,
+            }
+
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key)[1]
+
+response_cache = ResponseCache()
+
+# Validators (ETag / Last-Modified) and bodies of GET responses, for conditional requests
+CONDITIONAL_MAX_ENTRIES = 1024
+CONDITIONAL_MAX_BYTES = 16 * 1024 * 1024
+
+class ConditionalCache:
+    """Thread-safe LRU of the last 200 response per GET URL and its validators.
+
+    Unlike ResponseCache nothing expires: every use asks the server first
+    with If-None-Match / If-Modified-Since, and a 304 answer reuses the
+    stored, already-parsed body.
+    """
+
+    def __init__(self, max_entries=CONDITIONAL_MAX_ENTRIES, max_bytes=CONDITIONAL_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (request headers, size, value)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.conditional = self.not_modified_count = self.bytes_saved = self.bytes_downloaded = 0
+
+    def validators(self, key):
+        """Conditional request headers for key, or None if nothing is stored"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.conditional += 1
+            return dict(entry[0])
+
+    def store(self, key, status, headers, value, size):
+        """Remember a fresh response if it came with validators"""
+        with self._lock:
+            self.bytes_downloaded += size
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        validators = {}
+        if isinstance(etag, str):
+            validators['If-None-Match'] = etag
+        if isinstance(last_modified, str):
+            validators['If-Modified-Since'] = last_modified
+        ok = status == 200 and isinstance(value, dict) and 'error' not in value
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if not (ok and validators) or size > self.max_bytes:
+                return
+            self._entries[key] = (validators, size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def not_modified(self, key):
+        """The stored body for a 304 answer, or None if it has been evicted"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.not_modified_count += 1
+            self.bytes_saved += entry[1]
+            return entry[2]
+
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'bytes': self.bytes, 'conditional': self.conditional,
+                'not_modified': self.not_modified_count, 'bytes_saved': self.bytes_saved,
+                'bytes_downloaded': self.bytes_downloaded,
+                'not_modified_ratio': self.not_modified_count / self.conditional if self.conditional else 0.0,
+            }
+
+conditional_cache = ConditionalCache()
+
+def cache_key(api_key, endpoint):
+    """Cache key for a GET: (api key, path, normalized query)"""
+    path, _, query = endpoint.partition('?')
+    return (api_key, path, tuple(sorted(urllib.parse.parse_qsl(query, keep_blank_values=True))))
+
+def cache_ttl(endpoint):
+    """TTL in seconds for an endpoint, from CACHE_TTLS"""
+    for prefix, ttl in CACHE_TTLS:
+        if endpoint.startswith(prefix):
+            return ttl
+    return 0
+
+def cache_store(key, endpoint, result):
+    """Cache a successful GET result"""
+    if isinstance(result, dict) and 'error' not in result and result.get('success', True):
+        response_cache.put(key, result, cache_ttl(endpoint), len(json.dumps(result)))
+
+def invalidate_for_write(api_key, endpoint):
+    """Drop cached reads a write to endpoint may have made stale"""
+    resource = endpoint.lstrip('/').split('/', 1)[0].split('?', 1)[0]
+    response_cache.invalidate(api_key, CACHE_INVALIDATES.get(resource, ('/',)))
+
+MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY, title TEXT, content TEXT, url TEXT, author TEXT, submolt TEXT,
+    upvotes INTEGER, downvotes INTEGER, comment_count INTEGER, created_at TEXT, seen_at REAL);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY, post_id TEXT, parent_id TEXT, content TEXT, author TEXT,
+    upvotes INTEGER, created_at TEXT, seen_at REAL);
+CREATE TABLE IF NOT EXISTS agents (
+    name TEXT PRIMARY KEY, id TEXT, description TEXT, karma INTEGER,
+    follower_count INTEGER, following_count INTEGER, seen_at REAL);
+CREATE TABLE IF NOT EXISTS submolts (
+    name TEXT PRIMARY KEY, id TEXT, display_name TEXT, description TEXT, seen_at REAL);
+CREATE INDEX IF NOT EXISTS posts_created ON posts(created_at);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    title, content, author, submolt, content='posts', content_rowid='rowid', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, title, content, author, submolt)
+    VALUES (new.rowid, new.title, new.content, new.author, new.submolt);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE OF title, content, author, submolt ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, content, author, submolt)
+    VALUES ('delete', old.rowid, old.title, old.content, old.author, old.submolt);
+    INSERT INTO posts_fts(rowid, title, content, author, submolt)
+    VALUES (new.rowid, new.title, new.content, new.author, new.submolt);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, content, author, submolt)
+    VALUES ('delete', old.rowid, old.title, old.content, old.author, old.submolt);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    content, author, content='comments', content_rowid='rowid', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS comments_ai AFTER INSERT ON comments BEGIN
+    INSERT INTO comments_fts(rowid, content, author) VALUES (new.rowid, new.content, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_au AFTER UPDATE OF content, author ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, content, author) VALUES ('delete', old.rowid, old.content, old.author);
+    INSERT INTO comments_fts(rowid, content, author) VALUES (new.rowid, new.content, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_ad AFTER DELETE ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, content, author) VALUES ('delete', old.rowid, old.content, old.author);
+END;
+"""
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix"""
+    words = [w.replace('"', '""') for w in text.split()]
+    if not words:
+        return None
+    return ' '.join(f'"{w}"' for w in words[:-1]) + (' ' if len(words) > 1 else '') + f'"{words[-1]}"*'
+
+def open_db(path, schema, synchronous='NORMAL'):
+    """Open a SQLite database in WAL mode, shared across threads behind the caller's lock"""
+    if path != ':memory:':
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute(f'PRAGMA synchronous={synchronous}')
+    db.executescript(schema)
+    return db
+
+class LocalMirror:
+    """SQLite (WAL) copy of every post, comment, agent and submolt the API returns.
+
+    Rows are upserted, so re-fetching a post refreshes its counts without
+    losing fields a sparser response (e.g. a search hit) left out. Two FTS5
+    indexes kept in sync by triggers back offline search.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or MIRROR_FILE
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        if self._db is None:
+            self._db = open_db(self.path, MIRROR_SCHEMA)
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def ingest(self, result):
+        """Upsert every object found in an API response; returns the number of rows written"""
+        if not isinstance(result, dict) or 'error' in result:
+            return 0
+        posts, comments, agents, submolts = [], [], [], []
+        for post in result.get('posts') or []:
+            posts.append(post)
+        if isinstance(result.get('post'), dict):
+            posts.append(result['post'])
+        for comment in result.get('comments') or []:
+            comments.append(comment)
+        if isinstance(result.get('comment'), dict):
+            comments.append(result['comment'])
+        for hit in result.get('results') or []:
+            (comments if hit.get('type') == 'comment' else posts).append(hit)
+        if isinstance(result.get('agent'), dict):
+            agents.append(result['agent'])
+        submolts.extend(result.get('submolts') or [])
+        for item in posts + comments:
+            if isinstance(item.get('author'), dict):
+                agents.append(item['author'])
+            if isinstance(item.get('submolt'), dict):
+                submolts.append(item['submolt'])
+        if not (posts or comments or agents or submolts):
+            return 0
+
+        now = time.time()
+        name = lambda v: v.get('name') if isinstance(v, dict) else v
+        with self._lock:
+            db = self._conn()
+            with contextlib.closing(db.cursor()) as cur:
+                cur.execute('BEGIN')
+                try:
+                    cur.executemany("""
+                        INSERT INTO posts VALUES (?,?,?,?,?,?,?,?,?,?,?)
+                        ON CONFLICT(id) DO UPDATE SET
+                            title=coalesce(excluded.title, title), content=coalesce(excluded.content, content),
+                            url=coalesce(excluded.url, url), author=coalesce(excluded.author, author),
+                            submolt=coalesce(excluded.submolt, submolt), upvotes=coalesce(excluded.upvotes, upvotes),
+                            downvotes=coalesce(excluded.downvotes, downvotes),
+                            comment_count=coalesce(excluded.comment_count, comment_count),
+                            created_at=coalesce(excluded.created_at, created_at), seen_at=excluded.seen_at""",
+                        [(p.get('id') or p.get('post_id'), p.get('title'), p.get('content'), p.get('url'),
+                          name(p.get('author')), name(p.get('submolt')), p.get('upvotes'), p.get('downvotes'),
+                          p.get('comment_count'), p.get('created_at'), now) for p in posts if p.get('id') or p.get('post_id')])
+                    cur.executemany("""
+                        INSERT INTO comments VALUES (?,?,?,?,?,?,?,?)
+                        ON CONFLICT(id) DO UPDATE SET
+                            post_id=coalesce(excluded.post_id, post_id), parent_id=coalesce(excluded.parent_id, parent_id),
+                            content=coalesce(excluded.content, content), author=coalesce(excluded.author, author),
+                            upvotes=coalesce(excluded.upvotes, upvotes), created_at=coalesce(excluded.created_at, created_at),
+                            seen_at=excluded.seen_at""",
+                        [(c['id'], c.get('post_id') or name(c.get('post')), c.get('parent_id'), c.get('content'),
+                          name(c.get('author')), c.get('upvotes'), c.get('created_at'), now) for c in comments if c.get('id')])
+                    cur.executemany("""
+                        INSERT INTO agents VALUES (?,?,?,?,?,?,?)
+                        ON CONFLICT(name) DO UPDATE SET
+                            id=coalesce(excluded.id, id), description=coalesce(excluded.description, description),
+                            karma=coalesce(excluded.karma, karma),
+                            follower_count=coalesce(excluded.follower_count, follower_count),
+                            following_count=coalesce(excluded.following_count, following_count), seen_at=excluded.seen_at""",
+                        [(a['name'], a.get('id'), a.get('description'), a.get('karma'), a.get('follower_count'),
+                          a.get('following_count'), now) for a in agents if a.get('name')])
+                    cur.executemany("""
+                        INSERT INTO submolts VALUES (?,?,?,?,?)
+                        ON CONFLICT(name) DO UPDATE SET
+                            id=coalesce(excluded.id, id), display_name=coalesce(excluded.display_name, display_name),
+                            description=coalesce(excluded.description, description), seen_at=excluded.seen_at""",
+                        [(s['name'], s.get('id'), s.get('display_name'), s.get('description'), now)
+                         for s in submolts if s.get('name')])
+                    cur.execute('COMMIT')
+                except BaseException:
+                    cur.execute('ROLLBACK')
+                    raise
+        return len(posts) + len(comments) + len(agents) + len(submolts)
+
+    def search(self, text, limit=10):
+        """Full-text search over mirrored posts and comments, best bm25 match first"""
+        query = fts_query(text)
+        if query is None:
+            return []
+        with self._lock:
+            rows = self._conn().execute("""
+                SELECT * FROM (
+                    SELECT 'post' AS type, p.id, p.id AS post_id, p.title, p.author, p.submolt,
+                           snippet(posts_fts, 1, '', '', '...', 12) AS snippet,
+                           bm25(posts_fts, 10.0, 1.0, 2.0, 2.0) AS rank
+                    FROM posts_fts JOIN posts p ON p.rowid = posts_fts.rowid WHERE posts_fts MATCH ?
+                    UNION ALL
+                    SELECT 'comment', c.id, c.post_id, NULL, c.author, NULL,
+                           snippet(comments_fts, 0, '', '', '...', 12), bm25(comments_fts)
+                    FROM comments_fts JOIN comments c ON c.rowid = comments_fts.rowid WHERE comments_fts MATCH ?
+                ) ORDER BY rank LIMIT ?""", (query, query, limit)).fetchall()
+        return [dict(r) for r in rows]
+
+    def recent_posts(self, limit=10, offset=0):
+        """Newest mirrored posts, for browsing while the API is unreachable"""
+        with self._lock:
+            rows = self._conn().execute(
+                'SELECT * FROM posts ORDER BY created_at DESC LIMIT ? OFFSET ?', (limit, offset)).fetchall()
+        return [dict(r) for r in rows]
+
+    def get_state(self, key):
+        """JSON value saved under key, or None"""
+        with self._lock:
+            row = self._conn().execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_state(self, key, value):
+        with self._lock:
+            self._conn().execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?)', (key, json.dumps(value)))
+
+    def stats(self):
+        with self._lock:
+            db = self._conn()
+            return {table: db.execute(f'SELECT count(*) FROM {table}').fetchone()[0]
+                    for table in ('posts', 'comments', 'agents', 'submolts')}
+
+local_mirror = LocalMirror()
+
+def close_mirror():
+    local_mirror.close()
+
+def close_outbox():
+    outbox.close()
+
+def close_history():
+    history.close()
+
+def restore_history():
+    """Reload the shared terminal's tail at startup"""
+    if not output_log.listeners:
+        restore_log(output_log)
+
+def mirror_result(result):
+    """Keep a local copy of whatever the API returned; never fails the request"""
+    try:
+        local_mirror.ingest(result)
+    except sqlite3.Error as e:
+        print(f"Local mirror error: {e}")
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers asking for the same key.
+
+    Works for threads (do) and for coroutines on an event loop (ado); a result
+    or exception from the shared call is delivered to every waiter.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+        self._tasks = {}  # (loop, key) -> asyncio.Task
+        self.calls = self.coalesced = 0
+
+    def do(self, key, fn):
+        """Call fn() unless an identical call is already running; then wait for it"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, coro_fn):
+        """Await coro_fn() unless an identical call is already running on this loop"""
+        task_key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(task_key)
+        with self._lock:
+            if task is None:
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if task is None:
+            task = self._tasks[task_key] = asyncio.ensure_future(coro_fn())
+            task.add_done_callback(lambda t: self._tasks.pop(task_key, None))
+        # Shield so one waiter going away does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """Counters: upstream calls made and callers that piggybacked on one"""
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced}
+
+single_flight = SingleFlight()
+
+# Client-side pacing of writes: (burst, sustained writes per second) per endpoint class
+WRITE_RATE_LIMITS = {
+    'post': (1, 1 / 1800),
+    'comment': (5, 50 / 3600),
+    'vote': (10, 1.0),
+    'follow': (5, 0.5),
+    'write': (5, 1.0),
+}
+# Writes that would have to wait longer than this are refused instead of queued
+WRITE_MAX_QUEUE_DELAY = 300
+# Tell the user about queued writes expected to wait at least this long
+WRITE_QUEUE_NOTICE = 1.0
+WRITE_CLASSES = [
+    (re.compile(r'^/posts/?$'), 'post'),
+    (re.compile(r'^/posts/[^/]+/comments/?$'), 'comment'),
+    (re.compile(r'^/posts/[^/]+/(upvote|downvote|vote)/?$'), 'vote'),
+    (re.compile(r'^/agents/[^/]+/follow/?$'), 'follow'),
+]
+
+def write_class(endpoint):
+    """Rate-limit class of a write endpoint"""
+    path = endpoint.split('?', 1)[0]
+    for pattern, name in WRITE_CLASSES:
+        if pattern.match(path):
+            return name
+    return 'write'
+
+class RateBucket:
+    """Token bucket kept as a GCRA schedule, so callers are served in arrival order.
+
+    reserve() books the next free slot and returns how long the caller must
+    wait for it; a burst of `burst` writes goes through immediately.
+    """
+
+    def __init__(self, burst, rate):
+        self.burst = burst
+        self.rate = rate
+        self.interval = 1 / rate
+        self.tat = 0.0  # theoretical arrival time of the next write
+        self.waiting = 0
+
+    def delay(self, now):
+        """Seconds the next reservation would have to wait"""
+        return max(0.0, max(self.tat, now) - (self.burst - 1) * self.interval - now)
+
+    def reserve(self, now):
+        wait = self.delay(now)
+        self.tat = max(self.tat, now) + self.interval
+        return wait
+
+    def pause(self, now, seconds):
+        """Push the schedule back, e.g. after the server answered 429"""
+        self.tat = max(self.tat, now + seconds + (self.burst - 1) * self.interval)
+
+class WriteScheduler:
+    """Token buckets per (API key, write class)"""
+
+    def __init__(self, limits=None):
+        self.limits = limits or WRITE_RATE_LIMITS
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, api_key, cls):
+        bucket = self._buckets.get((api_key, cls))
+        if bucket is None:
+            bucket = self._buckets[(api_key, cls)] = RateBucket(*self.limits.get(cls, self.limits['write']))
+        return bucket
+
+    def reserve(self, api_key, endpoint):
+        """Book a slot for a write; returns (wait seconds, queue position) or (None, 0) if refused"""
+        with self._lock:
+            bucket = self._bucket(api_key, write_class(endpoint))
+            now = time.monotonic()
+            if bucket.delay(now) > WRITE_MAX_QUEUE_DELAY:
+                return None, 0
+            wait = bucket.reserve(now)
+            if wait > 0:
+                bucket.waiting += 1
+            return wait, bucket.waiting
+
+    def done_waiting(self, api_key, endpoint):
+        with self._lock:
+            self._bucket(api_key, write_class(endpoint)).waiting -= 1
+
+    def pause(self, api_key, endpoint, seconds):
+        """Hold back every queued write of this class after a 429"""
+        with self._lock:
+            self._bucket(api_key, write_class(endpoint)).pause(time.monotonic(), seconds)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def next_slot(self, api_key, endpoint):
+        """Seconds until a write to endpoint could go out"""
+        with self._lock:
+            return self._bucket(api_key, write_class(endpoint)).delay(time.monotonic())
+
+    def stats(self, api_key=None):
+        """Queue depth and ETA per (API key, class)"""
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {'api_key': key, 'class': cls, 'waiting': b.waiting, 'eta': b.delay(now) if b.waiting else 0.0,
+                 'next_slot': b.delay(now), 'rate': b.rate, 'burst': b.burst}
+                for (key, cls), b in self._buckets.items() if api_key is None or key == api_key
+            ]
+
+write_scheduler = WriteScheduler()
+
+def write_refused(endpoint, api_key):
+    """Error result for a write whose queue is too long"""
+    wait = write_scheduler.next_slot(api_key, endpoint)
+    return {'error': f"Rate limited: next {write_class(endpoint)} slot in {wait:.0f}s"}
+
+def write_queued_notice(endpoint, wait, position):
+    if wait >= WRITE_QUEUE_NOTICE:
+        add_output(f"Queued {write_class(endpoint)} write (#{position} in line, ETA {wait:.1f}s)", 'info')
 
 def moltbook_request(method, endpoint, api_key, data=None):
     """Make a request to Moltbook API"""
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json'
-    }
-    url = f"{API_BASE}{endpoint}"
+    if method not in ('GET', 'POST', 'DELETE', 'PATCH'):
+        return {'error': f'Unknown method: {method}'}
+    if method != 'GET':
+        wait, position = write_scheduler.reserve(api_key, endpoint)
+        if wait is None:
+            return write_refused(endpoint, api_key)
+        if wait > 0:
+            write_queued_notice(endpoint, wait, position)
+            try:
+                time.sleep(wait)
+            finally:
+                write_scheduler.done_waiting(api_key, endpoint)
+        result = _send_request(method, endpoint, api_key, data)
+        invalidate_for_write(api_key, endpoint)
+        mirror_result(result)
+        return result
+
+    key = cache_key(api_key, endpoint)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    def fetch():
+        result = _send_request(method, endpoint, api_key)
+        cache_store(key, endpoint, result)
+        mirror_result(result)
+        return result
+    return single_flight.do(key, fetch)
+
+async def amoltbook_request(method, endpoint, api_key, data=None, idempotency_key=None):
+    """Make a request to Moltbook API without blocking the event loop"""
+    if method not in ('GET', 'POST', 'DELETE', 'PATCH'):
+        return {'error': f'Unknown method: {method}'}
+    if method != 'GET':
+        wait, position = write_scheduler.reserve(api_key, endpoint)
+        if wait is None:
+            return write_refused(endpoint, api_key)
+        if wait > 0:
+            write_queued_notice(endpoint, wait, position)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                write_scheduler.done_waiting(api_key, endpoint)
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        result = await _asend_request(method, endpoint, api_key, data, headers)
+        invalidate_for_write(api_key, endpoint)
+        mirror_result(result)
+        return result
+
+    key = cache_key(api_key, endpoint)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def fetch():
+        result = await _asend_request(method, endpoint, api_key)
+        cache_store(key, endpoint, result)
+        mirror_result(result)
+        return result
+    return await single_flight.ado(key, fetch)
+
+# How often a running command checks whether the browser went away
+DISCONNECT_POLL = 0.5
+
+async def cancel_on_disconnect(req, coro):
+    """Await coro, cancelling it if the HTTP client disconnects first"""
+    task = asyncio.ensure_future(coro)
     try:
-        if method == 'GET':
-            resp = requests.get(url, headers=headers, timeout=30)
-        elif method == 'POST':
-            resp = requests.post(url, headers=headers, json=data, timeout=30)
-        elif method == 'DELETE':
-            resp = requests.delete(url, headers=headers, timeout=30)
-        elif method == 'PATCH':
-            resp = requests.patch(url, headers=headers, json=data, timeout=30)
-        else:
-            return {'error': f'Unknown method: {method}'}
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL)
+            if done:
+                return task.result()
+            if await req.is_disconnected():
+                task.cancel()
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+
+# Long-running background loops, started with the app and cancelled on shutdown
+_background_tasks = set()
+
+def spawn_background(coro):
+    """Run coro as a task owned by the app"""
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def start_background_tasks():
+    """Start the app's periodic maintenance loops"""
+    spawn_background(sweep_sessions_forever())
+    spawn_background(drain_outbox_forever())
+    if SYNC_ON_STARTUP:
+        feed_sync.task = spawn_background(sync_forever())
+
+async def stop_background_tasks():
+    """Cancel every background task and wait for them to finish"""
+    tasks = list(_background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+# Stylesheet and client script, served as fingerprinted static assets
+APP_CSS = """
+* { box-sizing: border-box; }
+body {
+    font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace;
+    background: #1a1a2e;
+    color: #eee;
+    margin: 0;
+    padding: 20px;
+    min-height: 100vh;
+}
+.container {
+    max-width: 900px;
+    margin: 0 auto;
+}
+h1 { color: #ff6b35; margin-bottom: 5px; }
+.subtitle { color: #888; margin-bottom: 20px; }
+.terminal {
+    background: #0d0d1a;
+    border: 1px solid #333;
+    border-radius: 8px;
+    padding: 15px;
+    margin-bottom: 20px;
+    max-height: 500px;
+    overflow-y: auto;
+}
+.output-line {
+    margin: 5px 0;
+    padding: 5px;
+    border-radius: 4px;
+    white-space: pre-wrap;
+    word-wrap: break-word;
+}
+.output-line.command { color: #4ecdc4; }
+.output-line.success { color: #95e1a3; background: #1a2e1a; }
+.output-line.error { color: #ff6b6b; background: #2e1a1a; }
+.output-line.info { color: #a8d8ea; }
+.input-area {
+    display: flex;
+    gap: 10px;
+    margin-bottom: 20px;
+}
+input[type="text"], input[type="password"] {
+    flex: 1;
+    padding: 12px;
+    background: #0d0d1a;
+    border: 1px solid #444;
+    border-radius: 6px;
+    color: #eee;
+    font-family: inherit;
+    font-size: 14px;
+}
+input:focus { outline: none; border-color: #ff6b35; }
+button {
+    padding: 12px 24px;
+    background: #ff6b35;
+    border: none;
+    border-radius: 6px;
+    color: white;
+    cursor: pointer;
+    font-family: inherit;
+    font-weight: bold;
+}
+button:hover { background: #ff8c5a; }
+button.secondary {
+    background: #444;
+}
+button.secondary:hover { background: #555; }
+.commands-help {
+    background: #16213e;
+    border-radius: 8px;
+    padding: 15px;
+    margin-top: 20px;
+}
+.commands-help h3 { color: #ff6b35; margin-top: 0; }
+.cmd { color: #4ecdc4; }
+.desc { color: #888; }
+.api-key-section {
+    background: #16213e;
+    border-radius: 8px;
+    padding: 15px;
+    margin-bottom: 20px;
+}
+.status-bar {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    padding: 10px;
+    background: #16213e;
+    border-radius: 8px;
+    margin-bottom: 20px;
+}
+.status-dot {
+    width: 10px;
+    height: 10px;
+    border-radius: 50%;
+    display: inline-block;
+    margin-right: 8px;
+}
+.status-dot.connected { background: #95e1a3; }
+.status-dot.disconnected { background: #ff6b6b; }
+textarea {
+    width: 100%;
+    padding: 12px;
+    background: #0d0d1a;
+    border: 1px solid #444;
+    border-radius: 6px;
+    color: #eee;
+    font-family: inherit;
+    font-size: 14px;
+    resize: vertical;
+    min-height: 150px;
+}
+textarea:focus { outline: none; border-color: #ff6b35; }
+.input-area-vertical {
+    display: flex;
+    flex-direction: column;
+    gap: 10px;
+    margin-bottom: 20px;
+}
+.input-area-vertical button {
+    align-self: flex-end;
+}
+.post-form {
+    background: #16213e;
+    border-radius: 8px;
+    padding: 20px;
+    margin-bottom: 20px;
+}
+.post-form h3 {
+    color: #ff6b35;
+    margin-top: 0;
+    margin-bottom: 15px;
+}
+.form-group {
+    margin-bottom: 15px;
+}
+.form-group label {
+    display: block;
+    margin-bottom: 5px;
+    color: #a8d8ea;
+    font-size: 14px;
+}
+.form-row {
+    display: flex;
+    gap: 15px;
+}
+.form-row .form-group {
+    flex: 1;
+}
+select {
+    width: 100%;
+    padding: 12px;
+    background: #0d0d1a;
+    border: 1px solid #444;
+    border-radius: 6px;
+    color: #eee;
+    font-family: inherit;
+    font-size: 14px;
+}
+select:focus { outline: none; border-color: #ff6b35; }
+.post-form textarea {
+    min-height: 200px;
+}
+.post-form button {
+    width: 100%;
+    padding: 15px;
+    font-size: 16px;
+}
+"""
+
+# Terminal lines arrive over /stream; keep the DOM at the server's capacity
+APP_JS = """
+let terminalSource = null;
+function appendToTerminal(html) {
+    const term = document.getElementById('terminal');
+    if (!term) return;
+    term.insertAdjacentHTML('beforeend', html);
+    const max = parseInt(term.dataset.capacity || '100');
+    while (term.children.length > max) term.firstElementChild.remove();
+    term.scrollTop = term.scrollHeight;
+}
+function connectTerminal() {
+    const term = document.getElementById('terminal');
+    if (!term || !term.dataset.stream || term.dataset.connected) return;
+    term.dataset.connected = '1';
+    if (terminalSource) terminalSource.close();
+    terminalSource = new EventSource(term.dataset.stream);
+    terminalSource.addEventListener('line', (e) => appendToTerminal(e.data));
+    terminalSource.addEventListener('reset', (e) => {
+        document.getElementById('terminal').innerHTML = e.data;
+    });
+}
+document.addEventListener('DOMContentLoaded', connectTerminal);
+document.addEventListener('htmx:load', connectTerminal);
+"""
+
+# Assets are immutable under their fingerprinted name
+ASSET_MAX_AGE = 365 * 24 * 3600
+GZIP_MIN_SIZE = 500
+
+class Asset:
+    """A static text asset with its fingerprinted URL and a precompressed copy"""
+
+    def __init__(self, name, ext, content, media_type):
+        self.body = content.encode()
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.digest = hashlib.sha256(self.body).hexdigest()[:12]
+        self.path = f'/assets/{name}-{self.digest}.{ext}'
+        self.etag = f'"{self.digest}"'
+        self.media_type = media_type
+
+    def response(self, request):
+        headers = {'Cache-Control': f'public, max-age={ASSET_MAX_AGE}, immutable', 'ETag': self.etag,
+                   'Vary': 'Accept-Encoding'}
+        if self.etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=304, headers=headers)
+        if 'gzip' in request.headers.get('accept-encoding', ''):
+            return Response(self.gzipped, media_type=self.media_type, headers={**headers, 'Content-Encoding': 'gzip'})
+        return Response(self.body, media_type=self.media_type, headers=headers)
 
-        return resp.json()
-    except requests.exceptions.RequestException as e:
-        return {'error': str(e)}
-    except json.JSONDecodeError:
-        return {'error': 'Invalid JSON response', 'raw': resp.text[:500]}
+ASSETS = {a.path: a for a in (Asset('app', 'css', APP_CSS, 'text/css'), Asset('app', 'js', APP_JS, 'text/javascript'))}
+app_css, app_js = ASSETS.values()
+
+async def serve_asset(request):
+    asset = ASSETS.get(request.url.path)
+    return asset.response(request) if asset else Response('Not found', status_code=404)
+
+class ETagMiddleware:
+    """Weak ETags on complete 200 GET responses, answering 304 when If-None-Match matches.
+
+    Streams (text/event-stream) and responses that already carry an ETag
+    pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            return await self.app(scope, receive, send)
+        if_none_match = Headers(scope=scope).get('if-none-match', '')
+        start, chunks = None, []
+
+        async def send_with_etag(message):
+            nonlocal start
+            if start is False:
+                return await send(message)
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                if (message['status'] != 200 or 'etag' in headers
+                        or headers.get('content-type', '').startswith('text/event-stream')):
+                    start = False
+                    return await send(message)
+                start = message
+                return
+            chunks.append(message.get('body', b''))
+            if message.get('more_body'):
+                return
+            body = b''.join(chunks)
+            etag = f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+            headers = MutableHeaders(raw=list(start['headers']))
+            headers['ETag'] = etag
+            headers.setdefault('Cache-Control', 'no-cache')
+            if etag in if_none_match:
+                del headers['content-length']
+                del headers['content-type']
+                await send({'type': 'http.response.start', 'status': 304, 'headers': headers.raw})
+                return await send({'type': 'http.response.body', 'body': b''})
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers.raw})
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_with_etag)
 
 # FastHTML app
 app, rt = fast_app(
     hdrs=[
-        Style("""
-            * { box-sizing: border-box; }
-            body {
-                font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace;
-                background: #1a1a2e;
-                color: #eee;
-                margin: 0;
-                padding: 20px;
-                min-height: 100vh;
-            }
-            .container {
-                max-width: 900px;
-                margin: 0 auto;
-            }
-            h1 { color: #ff6b35; margin-bottom: 5px; }
-            .subtitle { color: #888; margin-bottom: 20px; }
-            .terminal {
-                background: #0d0d1a;
-                border: 1px solid #333;
-                border-radius: 8px;
-                padding: 15px;
-                margin-bottom: 20px;
-                max-height: 500px;
-                overflow-y: auto;
-            }
-            .output-line {
-                margin: 5px 0;
-                padding: 5px;
-                border-radius: 4px;
-                white-space: pre-wrap;
-                word-wrap: break-word;
-            }
-            .output-line.command { color: #4ecdc4; }
-            .output-line.success { color: #95e1a3; background: #1a2e1a; }
-            .output-line.error { color: #ff6b6b; background: #2e1a1a; }
-            .output-line.info { color: #a8d8ea; }
-            .input-area {
-                display: flex;
-                gap: 10px;
-                margin-bottom: 20px;
-            }
-            input[type="text"], input[type="password"] {
-                flex: 1;
-                padding: 12px;
-                background: #0d0d1a;
-                border: 1px solid #444;
-                border-radius: 6px;
-                color: #eee;
-                font-family: inherit;
-                font-size: 14px;
-            }
-            input:focus { outline: none; border-color: #ff6b35; }
-            button {
-                padding: 12px 24px;
-                background: #ff6b35;
-                border: none;
-                border-radius: 6px;
-                color: white;
-                cursor: pointer;
-                font-family: inherit;
-                font-weight: bold;
-            }
-            button:hover { background: #ff8c5a; }
-            button.secondary {
-                background: #444;
-            }
-            button.secondary:hover { background: #555; }
-            .commands-help {
-                background: #16213e;
-                border-radius: 8px;
-                padding: 15px;
-                margin-top: 20px;
-            }
-            .commands-help h3 { color: #ff6b35; margin-top: 0; }
-            .cmd { color: #4ecdc4; }
-            .desc { color: #888; }
-            .api-key-section {
-                background: #16213e;
-                border-radius: 8px;
-                padding: 15px;
-                margin-bottom: 20px;
-            }
-            .status-bar {
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                padding: 10px;
-                background: #16213e;
-                border-radius: 8px;
-                margin-bottom: 20px;
-            }
-            .status-dot {
-                width: 10px;
-                height: 10px;
-                border-radius: 50%;
-                display: inline-block;
-                margin-right: 8px;
-            }
-            .status-dot.connected { background: #95e1a3; }
-            .status-dot.disconnected { background: #ff6b6b; }
-            textarea {
-                width: 100%;
-                padding: 12px;
-                background: #0d0d1a;
-                border: 1px solid #444;
-                border-radius: 6px;
-                color: #eee;
-                font-family: inherit;
-                font-size: 14px;
-                resize: vertical;
-                min-height: 150px;
-            }
-            textarea:focus { outline: none; border-color: #ff6b35; }
-            .input-area-vertical {
-                display: flex;
-                flex-direction: column;
-                gap: 10px;
-                margin-bottom: 20px;
-            }
-            .input-area-vertical button {
-                align-self: flex-end;
-            }
-            .post-form {
-                background: #16213e;
-                border-radius: 8px;
-                padding: 20px;
-                margin-bottom: 20px;
-            }
-            .post-form h3 {
-                color: #ff6b35;
-                margin-top: 0;
-                margin-bottom: 15px;
-            }
-            .form-group {
-                margin-bottom: 15px;
-            }
-            .form-group label {
-                display: block;
-                margin-bottom: 5px;
-                color: #a8d8ea;
-                font-size: 14px;
-            }
-            .form-row {
-                display: flex;
-                gap: 15px;
-            }
-            .form-row .form-group {
-                flex: 1;
-            }
-            select {
-                width: 100%;
-                padding: 12px;
-                background: #0d0d1a;
-                border: 1px solid #444;
-                border-radius: 6px;
-                color: #eee;
-                font-family: inherit;
-                font-size: 14px;
-            }
-            select:focus { outline: none; border-color: #ff6b35; }
-            .post-form textarea {
-                min-height: 200px;
-            }
-            .post-form button {
-                width: 100%;
-                padding: 15px;
-                font-size: 16px;
-            }
-        """)
-    ]
+        Link(rel='stylesheet', href=app_css.path),
+        Script(src=app_js.path),
+    ],
+    on_startup=[restore_history, start_background_tasks],
+    on_shutdown=[stop_background_tasks, close_sessions, aclose_async_clients, close_mirror, close_outbox, close_history]
 )
+# Ahead of FastHTML's catch-all static file route
+app.router.routes.insert(0, Route('/assets/{name}', serve_asset))
+# Added first so it sees uncompressed bodies; gzip wraps it
+app.add_middleware(ETagMiddleware)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=6)
+app.add_middleware(MetricsMiddleware)
+
+# Number of terminal lines kept in memory
+OUTPUT_LOG_SIZE = 100
+
+class OutputLog:
+    """Fixed-capacity ring buffer of terminal lines.
+
+    Every entry gets a monotonically increasing 'seq', so a client that
+    remembers the last seq it rendered can ask for just the newer lines.
+    """
+
+    def __init__(self, capacity=OUTPUT_LOG_SIZE, on_resize=None):
+        self.capacity = capacity
+        self._buf = [None] * capacity
+        self.first_seq = 0  # oldest retained entry
+        self.next_seq = 0   # seq the next appended entry will get
+        self.bytes = 0      # approximate size of the retained text
+        self.on_resize = on_resize
+        self.listeners = set()  # callables(event, entry) told about 'line' and 'reset'
+
+    def append(self, entry):
+        """Store entry, overwriting the oldest one when full; returns its seq"""
+        seq = self.next_seq
+        entry['seq'] = seq
+        delta = len(entry.get('text', ''))
+        if self.next_seq - self.first_seq == self.capacity:
+            delta -= len(self._buf[seq % self.capacity].get('text', ''))
+            self.first_seq += 1
+        self._buf[seq % self.capacity] = entry
+        self.next_seq = seq + 1
+        self._resize(delta)
+        self._notify('line', entry)
+        return seq
+
+    def _notify(self, event, entry):
+        for listener in list(self.listeners):
+            listener(event, entry)
+
+    def _resize(self, delta):
+        self.bytes += delta
+        if self.on_resize and delta:
+            self.on_resize(delta)
+
+    def since(self, seq):
+        """Entries with seq >= seq that are still retained, oldest first"""
+        return [self._buf[s % self.capacity] for s in range(max(seq, self.first_seq), self.next_seq)]
+
+    def clear(self):
+        """Drop all entries; sequence numbers keep counting up"""
+        self._buf = [None] * self.capacity
+        self.first_seq = self.next_seq
+        self._resize(-self.bytes)
+        self._notify('reset', None)
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('output log index out of range')
+        return self._buf[(self.first_seq + index) % self.capacity]
+
+    def __iter__(self):
+        return iter(self.since(self.first_seq))
+
+# History segments roll over at this size; the tail restored into a new terminal
+# is looked for in at most HISTORY_RESTORE_SCAN_BYTES of the newest lines
+HISTORY_SEGMENT_BYTES = 8 * 1024 * 1024
+HISTORY_RESTORE_SCAN_BYTES = 1024 * 1024
+HISTORY_GREP_LIMIT = 50
+
+def reverse_lines(path):
+    """Lines of a file from last to first, read through mmap without loading the file"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = size - 1 if mm[size - 1:size] == b'\n' else size
+            while end > 0:
+                start = mm.rfind(b'\n', 0, end) + 1
+                yield mm[start:end]
+                end = start - 1
+
+class History:
+    """Append-only terminal history in rotated JSONL segments.
+
+    Segment files are named after the number of their first line, so the
+    sorted directory listing is the index: finding line n, the newest
+    segment or the total line count never reads old segments. Readers walk
+    segments newest first and stop as soon as they have what they need.
+    """
+
+    def __init__(self, path=None, segment_bytes=None):
+        self.path = path or HISTORY_DIR
+        self.segment_bytes = segment_bytes or HISTORY_SEGMENT_BYTES
+        self.next_line = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def segments(self):
+        """(first line number, path) of every segment, oldest first"""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted((int(name[8:-6]), os.path.join(self.path, name)) for name in names
+                      if name.startswith('history-') and name.endswith('.jsonl') and name[8:-6].isdigit())
+
+    def _segment_path(self, first_line):
+        return os.path.join(self.path, f'history-{first_line:012d}.jsonl')
+
+    def _open(self):
+        """Find where the newest segment ends; only its last complete line is read"""
+        os.makedirs(self.path, exist_ok=True)
+        self.next_line = 0
+        segments = self.segments()
+        if segments:
+            first, path = segments[-1]
+            self.next_line = first
+            for record in self._records(reverse_lines(path)):
+                self.next_line = record['n'] + 1
+                break
+            self._file = open(path, 'ab')
+        else:
+            self._file = open(self._segment_path(0), 'ab')
+
+    def append(self, entry, sid=None):
+        """Record one terminal line; returns its history line number"""
+        with self._lock:
+            if self._file is None:
+                self._open()
+            elif self._file.tell() >= self.segment_bytes:
+                self._file.close()
+                self._file = open(self._segment_path(self.next_line), 'ab')
+            n = self.next_line
+            record = {'n': n, 'sid': sid, 'time': entry.get('time'), 'style': entry.get('style'), 'text': entry.get('text')}
+            self._file.write(json.dumps(record).encode() + b'\n')
+            self._file.flush()
+            self.next_line = n + 1
+            return n
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
 
-# In-memory output log (resets on restart)
-output_log = []
+    @staticmethod
+    def _records(lines):
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
 
-def add_output(text, style='info'):
-    """Add a line to the output log"""
-    output_log.append({'text': text, 'style': style, 'time': datetime.now().isoformat()})
-    # Keep last 100 entries
-    if len(output_log) > 100:
-        output_log.pop(0)
+    def newest(self, max_bytes=None):
+        """Records from newest to oldest, lazily, optionally stopping after max_bytes"""
+        scanned = 0
+        for _, path in reversed(self.segments()):
+            for line in reverse_lines(path):
+                scanned += len(line) + 1
+                if max_bytes is not None and scanned > max_bytes:
+                    return
+                yield from self._records([line])
 
-def render_terminal():
+    def tail(self, n, sid=None, max_bytes=None):
+        """The last n records (of session sid, if given), oldest first"""
+        found = []
+        for record in self.newest(max_bytes):
+            if len(found) == n:
+                break
+            if sid is None or record.get('sid') == sid:
+                found.append(record)
+        return found[::-1]
+
+    def grep(self, pattern, limit=HISTORY_GREP_LIMIT):
+        """The newest records whose text matches pattern (a regex, or plain text if invalid), oldest first"""
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            regex = re.compile(re.escape(pattern), re.IGNORECASE)
+        found = []
+        for record in self.newest():
+            if len(found) == limit:
+                break
+            if regex.search(record.get('text') or ''):
+                found.append(record)
+        return found[::-1]
+
+history = History()
+
+def record_history(log, sid=None):
+    """Have every new line of log appended to the persistent history"""
+    def listener(event, entry):
+        if event == 'line' and entry.get('record', True):
+            try:
+                history.append(entry, sid)
+            except OSError as e:
+                print(f"History error: {e}")
+    log.listeners.add(listener)
+
+def restore_log(log, sid=None):
+    """Refill a fresh terminal with its most recent history"""
+    try:
+        records = history.tail(log.capacity, sid, HISTORY_RESTORE_SCAN_BYTES)
+    except OSError:
+        records = []
+    for record in records:
+        log.append({'text': record['text'], 'style': record['style'], 'time': record['time']})
+    record_history(log, sid)
+    return log
+
+# Output log used outside of a browser session; its tail is restored from history at startup
+output_log = OutputLog()
+
+# Per-session terminals: bounded count and memory, idle ones swept out
+SESSION_MAX = 1000
+SESSION_MAX_BYTES = 16 * 1024 * 1024
+SESSION_IDLE_SECONDS = 3600
+SESSION_SWEEP_INTERVAL = 60
+
+class SessionLogs:
+    """OutputLog per browser session, kept in LRU order.
+
+    Lookup is O(1). Least recently used sessions are evicted when there are
+    more than max_sessions or their text exceeds max_bytes in total, and the
+    sweeper drops sessions idle for longer than idle_seconds.
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX, max_bytes=SESSION_MAX_BYTES, idle_seconds=SESSION_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._logs = OrderedDict()  # sid -> (OutputLog, last access, data dict), least recent first
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, sid):
+        """The log for sid, created on first use"""
+        return self._touch(sid)[0]
+
+    def data(self, sid):
+        """Per-session scratch dict (e.g. feed cursors), dropped with the session"""
+        return self._touch(sid)[2]
+
+    def _touch(self, sid):
+        # A new session's terminal is refilled from history before taking the lock
+        fresh = restore_log(OutputLog(), sid) if sid not in self._logs else None
+        with self._lock:
+            entry = self._logs.pop(sid, None)
+            if entry:
+                log, data = entry[0], entry[2]
+            else:
+                log, data = fresh or restore_log(OutputLog(), sid), {}
+                log.on_resize = self._account
+                self.bytes += log.bytes
+            entry = self._logs[sid] = (log, time.monotonic(), data)
+            while len(self._logs) > 1 and (len(self._logs) > self.max_sessions or self.bytes > self.max_bytes):
+                self._drop(next(iter(self._logs)))
+            return entry
+
+    def sweep(self, now=None):
+        """Evict sessions idle past the timeout; returns how many were dropped"""
+        cutoff = (now if now is not None else time.monotonic()) - self.idle_seconds
+        dropped = 0
+        with self._lock:
+            while self._logs:
+                sid, (_, last_seen, _) = next(iter(self._logs.items()))
+                if last_seen > cutoff:
+                    break
+                self._drop(sid)
+                dropped += 1
+        return dropped
+
+    def __len__(self):
+        return len(self._logs)
+
+    def __contains__(self, sid):
+        return sid in self._logs
+
+    def _account(self, delta):
+        with self._lock:
+            self.bytes += delta
+
+    def _drop(self, sid):
+        log = self._logs.pop(sid)[0]
+        log.on_resize = None
+        self.bytes -= log.bytes
+        self.evictions += 1
+
+session_logs = SessionLogs()
+
+async def sweep_sessions_forever():
+    """Periodically evict idle session logs"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        session_logs.sweep()
+
+_current_log = contextvars.ContextVar('current_log', default=None)
+_current_data = contextvars.ContextVar('current_data', default=None)
+_current_sid = contextvars.ContextVar('current_sid', default=None)
+# Scratch data used outside of a browser session
+shared_session_data = {}
+
+def current_log():
+    """The output log of the session being served (the shared log otherwise)"""
+    log = _current_log.get()
+    return output_log if log is None else log
+
+def session_data():
+    """Scratch dict of the session being served (a shared one otherwise)"""
+    data = _current_data.get()
+    return shared_session_data if data is None else data
+
+def bind_session_log(session):
+    """Route add_output for the rest of this request to the session's own log"""
+    sid = session.get('sid')
+    if not sid:
+        sid = session['sid'] = uuid.uuid4().hex
+    log = session_logs.get(sid)
+    _current_log.set(log)
+    _current_data.set(session_logs.data(sid))
+    _current_sid.set(sid)
+    return log
+
+def add_output(text, style='info', record=True):
+    """Add a line to the output log (and, unless record is False, to the history)"""
+    entry = {'text': text, 'style': style, 'time': datetime.now().isoformat()}
+    if not record:
+        entry['record'] = False
+    return current_log().append(entry)
+
+def render_entry(entry):
+    """Render one terminal line"""
+    return Div(entry['text'], cls=f"output-line {entry['style']}")
+
+def render_seq_marker():
+    """Out-of-band update of the last seq the client has rendered"""
+    return Input(type='hidden', name='since', id='terminal-seq', value=str(current_log().next_seq), hx_swap_oob='true')
+
+def render_terminal(log=None):
     """Render the terminal output"""
-    if not output_log:
-        return Div("Welcome! Enter your API key above or type 'help' for commands.", cls='output-line info')
-    return Div(*[
-        Div(entry['text'], cls=f"output-line {entry['style']}")
-        for entry in output_log
-    ])
+    log = current_log() if log is None else log
+    if not log:
+        return (Div("Welcome! Enter your API key above or type 'help' for commands.", cls='output-line info'),)
+    return tuple(render_entry(entry) for entry in log)
 
-@rt('/')
-def get():
-    api_key = load_api_key()
-    return Div(
-        H1("Moltbook Human-Agent Interface"),
-        P("Act as an AI agent on the Moltbook social network", cls='subtitle'),
+def render_updates(since=None):
+    """Render only the lines added after `since`, for an htmx beforeend swap.
 
-        # Status bar
-        Div(
-            Span(
-                Span(cls=f"status-dot {'connected' if api_key else 'disconnected'}"),
-                f"{'Connected' if api_key else 'Not connected'}"
-            ),
-            Span(f"API Key: {'*' * 8 + api_key[-8:] if api_key and len(api_key) > 8 else 'Not set'}"),
-            cls='status-bar'
-        ),
+    Falls back to re-rendering the whole terminal (and switching the swap to
+    innerHTML) when the client has no seq or has fallen out of the buffer.
+    """
+    log = current_log()
+    if since is None or not log.first_seq <= since <= log.next_seq:
+        return render_terminal(), render_seq_marker(), HtmxResponseHeaders(reswap='innerHTML')
+    return tuple(render_entry(entry) for entry in log.since(since)), render_seq_marker()
 
-        # API Key section
-        Div(
-            H3("API Key"),
-            Form(
-                Div(
-                    Input(type='password', name='api_key', placeholder='Enter your Moltbook API key (moltbook_xxx)', value=api_key),
-                    Button("Save Key", type='submit'),
-                    cls='input-area'
-                ),
-                hx_post='/set-key',
-                hx_target='#main-content',
-                hx_swap='outerHTML'
-            ),
-            cls='api-key-section'
-        ),
+# Feed paging
+FEED_SORTS = ['hot', 'new', 'top', 'rising']
+FEED_DEFAULT_LIMIT = 10
+FEED_MAX_LIMIT = 50
 
-        # Create Post form
-        Div(
+def next_feed_offset(result, offset):
+    """Offset of the page after `result`, and whether the API says there is one"""
+    posts = result.get('posts') or []
+    has_more = bool(posts) and result.get('has_more', len(posts) > 0)
+    return result.get('next_offset') or offset + len(posts), has_more
+
+async def feed_pages(api_key, sort='hot', limit=FEED_DEFAULT_LIMIT, offset=0):
+    """Yield /posts result pages in order, fetching the next page while the caller renders this one.
+
+    A failed page is yielded as-is and requested again on the next iteration.
+    """
+    def fetch(at):
+        return asyncio.ensure_future(amoltbook_request('GET', f'/posts?sort={sort}&limit={limit}&offset={at}', api_key))
+
+    pending = fetch(offset)
+    try:
+        while True:
+            result = await pending
+            pending = None
+            has_more = True
+            if result.get('success'):
+                offset, has_more = next_feed_offset(result, offset)
+                if has_more:
+                    pending = fetch(offset)
+            yield result
+            if not has_more:
+                return
+            if pending is None:
+                pending = fetch(offset)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+class FeedCursor:
+    """A session's position in the feed, backed by a prefetching feed_pages generator"""
+
+    def __init__(self, api_key, sort='hot', limit=FEED_DEFAULT_LIMIT):
+        self.api_key = api_key
+        self.sort = sort
+        self.limit = limit
+        self.offset = 0
+        self.pages_read = 0
+        self._pages = None
+        self._loop = None
+
+    async def next_page(self):
+        """The next page's result, or None once the feed is exhausted"""
+        loop = asyncio.get_running_loop()
+        if self._pages is None or self._loop is not loop:
+            # A generator (and its prefetch task) cannot move between event loops
+            self._pages = feed_pages(self.api_key, self.sort, self.limit, self.offset)
+            self._loop = loop
+        try:
+            result = await anext(self._pages)
+        except StopAsyncIteration:
+            return None
+        if result.get('success'):
+            self.offset = next_feed_offset(result, self.offset)[0]
+            self.pages_read += 1
+        return result
+
+# Background sync of new posts into the local mirror
+SYNC_ON_STARTUP = os.environ.get('MOLTBOOK_SYNC', '1') != '0'
+SYNC_PAGE_SIZE = 25
+# Pages read per poll before giving up on reaching the watermark
+SYNC_MAX_PAGES = 20
+SYNC_MIN_INTERVAL = 10
+SYNC_MAX_INTERVAL = 300
+
+def post_key(post):
+    return post.get('created_at') or ''
+
+class FeedSync:
+    """Polls sort=new and mirrors only the posts newer than the last one seen.
+
+    The watermark (newest created_at plus the ids sharing it) lives in the
+    mirror, so a restart resumes where it left off. Polls come faster while
+    new posts keep arriving and back off while the feed is quiet.
+    """
+
+    def __init__(self):
+        self.interval = SYNC_MIN_INTERVAL
+        self.started = time.time()
+        self.polls = self.api_calls = self.ingested = self.gaps = 0
+        self.last_poll = self.last_success = None
+        self.last_error = None
+        self.task = None
+
+    def watermark(self):
+        return local_mirror.get_state('sync_watermark')
+
+    async def sync_once(self, api_key):
+        """Fetch and mirror new posts; returns how many were new"""
+        watermark = self.watermark()
+        seen = set(watermark['ids']) if watermark else set()
+        delta, offset, reached = [], 0, watermark is None
+        for _ in range(SYNC_MAX_PAGES):
+            result = await _asend_request('GET', f'/posts?sort=new&limit={SYNC_PAGE_SIZE}&offset={offset}', api_key)
+            self.api_calls += 1
+            if not result.get('success'):
+                raise RuntimeError(result.get('error') or 'sync request failed')
+            for post in result.get('posts') or []:
+                if watermark and (post_key(post) < watermark['created_at']
+                                  or (post_key(post) == watermark['created_at'] and post.get('id') in seen)):
+                    reached = True
+                    break
+                delta.append(post)
+            # The first sync only takes a snapshot of the newest page
+            if reached or watermark is None:
+                break
+            offset, has_more = next_feed_offset(result, offset)
+            if not has_more:
+                reached = True
+                break
+        if not reached:
+            self.gaps += 1
+
+        if delta:
+            local_mirror.ingest({'posts': delta})
+            newest = post_key(delta[0])
+            ids = [p.get('id') for p in delta if post_key(p) == newest]
+            if watermark and watermark['created_at'] == newest:
+                ids += watermark['ids']
+            local_mirror.set_state('sync_watermark', {'created_at': newest, 'ids': ids})
+        self.ingested += len(delta)
+        return len(delta)
+
+    async def poll(self, api_key):
+        """One sync, adapting the interval to how much was new; None if it failed"""
+        self.polls += 1
+        self.last_poll = time.time()
+        try:
+            new = await self.sync_once(api_key)
+        except Exception as e:
+            self.last_error = str(e)
+            self.interval = min(self.interval * 2, SYNC_MAX_INTERVAL)
+            return None
+        self.last_error = None
+        self.last_success = self.last_poll
+        if new:
+            self.interval = max(self.interval / 2, SYNC_MIN_INTERVAL)
+        else:
+            self.interval = min(self.interval * 1.5, SYNC_MAX_INTERVAL)
+        return new
+
+    def status(self):
+        """Lag, throughput and counters for 'sync status'"""
+        now = time.time()
+        watermark = self.watermark()
+        newest = None
+        if watermark and watermark['created_at']:
+            with contextlib.suppress(ValueError):
+                newest = datetime.fromisoformat(watermark['created_at'].replace('Z', '+00:00')).timestamp()
+        return {
+            'running': self.task is not None and not self.task.done(),
+            'interval': self.interval, 'polls': self.polls, 'api_calls': self.api_calls,
+            'ingested': self.ingested, 'gaps': self.gaps, 'last_error': self.last_error,
+            'lag': now - self.last_success if self.last_success else None,
+            'newest_age': now - newest if newest else None,
+            'rate': self.ingested / max(now - self.started, 1e-9),
+        }
+
+feed_sync = FeedSync()
+
+async def sync_forever():
+    """Keep the mirror up to date with new posts"""
+    while True:
+        api_key = load_api_key()
+        if api_key:
+            await feed_sync.poll(api_key)
+        await asyncio.sleep(feed_sync.interval)
+
+# Durable outbox: posts and comments are journaled, then sent by a background drainer
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_BACKOFF_BASE = 2
+OUTBOX_BACKOFF_MAX = 600
+# How often the drainer looks at the journal when nothing wakes it
+OUTBOX_IDLE_POLL = 30
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, api_key TEXT NOT NULL,
+    method TEXT NOT NULL, endpoint TEXT NOT NULL, body TEXT, kind TEXT, label TEXT, origin TEXT,
+    state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL, last_error TEXT, result TEXT, created REAL NOT NULL, updated REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox(state, next_attempt);
+"""
+
+class Outbox:
+    """Append-only SQLite journal of writes, each with its own idempotency key.
+
+    Entries move pending -> sending -> sent, back to pending with a later
+    next_attempt when a send fails, and to failed once they run out of
+    attempts. Entries left 'sending' by a crash are resent on startup; the
+    idempotency key lets the server drop the duplicate.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or OUTBOX_FILE
+        self._db = None
+        self._lock = threading.Lock()
+        self.wakeup = None  # asyncio.Event of the running drainer
+
+    def _conn(self):
+        if self._db is None:
+            self._db = open_db(self.path, OUTBOX_SCHEMA, synchronous='FULL')
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def add(self, api_key, method, endpoint, data, kind, label, origin=None):
+        """Journal a write and wake the drainer; returns the new entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn().execute(
+                """INSERT INTO outbox (key, api_key, method, endpoint, body, kind, label, origin, next_attempt, created, updated)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) RETURNING *""",
+                (uuid.uuid4().hex, api_key, method, endpoint, json.dumps(data), kind, label, origin, now, now, now)).fetchone()
+        self.wake()
+        return dict(row)
+
+    def wake(self):
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def claim_due(self, now=None, limit=20):
+        """Mark due entries as sending and return them, oldest first"""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn().execute(
+                """UPDATE outbox SET state = 'sending', updated = ?
+                   WHERE id IN (SELECT id FROM outbox WHERE state = 'pending' AND next_attempt <= ? ORDER BY id LIMIT ?)
+                   RETURNING *""", (now, now, limit)).fetchall()
+        return sorted((dict(r) for r in rows), key=lambda r: r['id'])
+
+    def _update(self, entry_id, **fields):
+        fields['updated'] = time.time()
+        with self._lock:
+            cur = self._conn().execute(
+                f"UPDATE outbox SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?", (*fields.values(), entry_id))
+        return cur.rowcount > 0
+
+    def mark_sent(self, entry_id, result):
+        self._update(entry_id, state='sent', result=json.dumps(result), last_error=None)
+
+    def mark_retry(self, entry_id, error, delay, attempts):
+        self._update(entry_id, state='pending', next_attempt=time.time() + delay, last_error=error, attempts=attempts)
+
+    def mark_failed(self, entry_id, error, attempts):
+        self._update(entry_id, state='failed', last_error=error, attempts=attempts)
+
+    def retry(self, entry_id):
+        """Send a failed or waiting entry again right away"""
+        with self._lock:
+            cur = self._conn().execute(
+                """UPDATE outbox SET state = 'pending', attempts = 0, next_attempt = ?, updated = ?
+                   WHERE id = ? AND state IN ('pending', 'failed')""", (time.time(), time.time(), entry_id))
+        self.wake()
+        return cur.rowcount > 0
+
+    def drop(self, entry_id):
+        """Give up on an entry that has not been sent"""
+        with self._lock:
+            cur = self._conn().execute(
+                "UPDATE outbox SET state = 'dropped', updated = ? WHERE id = ? AND state IN ('pending', 'failed')",
+                (time.time(), entry_id))
+        return cur.rowcount > 0
+
+    def recover(self):
+        """Requeue entries a previous process was sending when it stopped"""
+        with self._lock:
+            return self._conn().execute(
+                "UPDATE outbox SET state = 'pending', next_attempt = ? WHERE state = 'sending'", (time.time(),)).rowcount
+
+    def get(self, entry_id):
+        with self._lock:
+            row = self._conn().execute('SELECT * FROM outbox WHERE id = ?', (entry_id,)).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, states=('pending', 'sending', 'failed'), limit=50):
+        with self._lock:
+            rows = self._conn().execute(
+                f"SELECT * FROM outbox WHERE state IN ({','.join('?' * len(states))}) ORDER BY id DESC LIMIT ?",
+                (*states, limit)).fetchall()
+        return [dict(r) for r in reversed(rows)]
+
+    def next_due(self):
+        """Seconds until the next pending entry is due, or None if there is none"""
+        with self._lock:
+            row = self._conn().execute("SELECT min(next_attempt) FROM outbox WHERE state = 'pending'").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+outbox = Outbox()
+
+def outbox_backoff(attempts):
+    """Full-jitter exponential backoff before retry number `attempts`"""
+    return random.uniform(0, min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** attempts))
+
+def report_outbox_result(entry, result):
+    """Tell the user how a journaled write went"""
+    if entry['kind'] == 'post':
+        post_data = result.get('post', {})
+        add_output(f"Post created! ID: {post_data.get('id', 'unknown')} ({entry['label']})", 'success')
+        if post_data.get('url'):
+            add_output(f"URL: {post_data.get('url')}", 'info')
+    elif entry['kind'] == 'comment':
+        add_output(f"Comment added! ({entry['label']})", 'success')
+    else:
+        add_output(f"Sent {entry['label']}", 'success')
+
+async def send_outbox_entry(entry):
+    """Send one claimed entry and record the outcome; returns the new state"""
+    api_key, endpoint = entry['api_key'], entry['endpoint']
+    # Leave the entry queued rather than hold the drainer while its bucket refills
+    wait = write_scheduler.next_slot(api_key, endpoint)
+    if wait > 0:
+        outbox.mark_retry(entry['id'], entry['last_error'], wait, entry['attempts'])
+        return 'pending'
+
+    token = None
+    if entry['origin'] and entry['origin'] in session_logs:
+        token = _current_log.set(session_logs.get(entry['origin']))
+    try:
+        result = await amoltbook_request(entry['method'], endpoint, api_key, json.loads(entry['body'] or 'null'),
+                                         idempotency_key=entry['key'])
+        if result.get('success'):
+            outbox.mark_sent(entry['id'], result)
+            report_outbox_result(entry, result)
+            return 'sent'
+
+        error = result.get('error') or json.dumps(result)
+        attempts = entry['attempts'] + 1
+        if attempts >= OUTBOX_MAX_ATTEMPTS:
+            outbox.mark_failed(entry['id'], error, attempts)
+            add_output(f"Outbox #{entry['id']} ({entry['label']}) failed after {attempts} attempts: {error}. "
+                       f"Use 'outbox retry {entry['id']}' or 'outbox drop {entry['id']}'.", 'error')
+            return 'failed'
+        delay = max(outbox_backoff(attempts), write_scheduler.next_slot(api_key, endpoint))
+        outbox.mark_retry(entry['id'], error, delay, attempts)
+        add_output(f"Outbox #{entry['id']} ({entry['label']}) not sent: {error}. Retrying in {delay:.0f}s.", 'error')
+        return 'pending'
+    finally:
+        if token is not None:
+            _current_log.reset(token)
+
+async def drain_outbox():
+    """Send every entry that is due"""
+    sent = 0
+    while entries := outbox.claim_due():
+        for entry in entries:
+            sent += await send_outbox_entry(entry) == 'sent'
+    return sent
+
+async def drain_outbox_forever():
+    """Send journaled writes as they arrive and retry failed ones when due"""
+    outbox.recover()
+    wakeup = outbox.wakeup = asyncio.Event()
+    while True:
+        wakeup.clear()
+        try:
+            await drain_outbox()
+        except sqlite3.Error as e:
+            print(f"Outbox error: {e}")
+        due = outbox.next_due()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(wakeup.wait(), OUTBOX_IDLE_POLL if due is None else min(due, OUTBOX_IDLE_POLL))
+
+def journal_write(api_key, endpoint, data, kind, label):
+    """Journal a post or comment for the drainer and tell the user"""
+    entry = outbox.add(api_key, 'POST', endpoint, data, kind, label, _current_sid.get())
+    add_output(f"Queued {label} as outbox #{entry['id']}; it will be sent in the background.", 'info')
+    return entry
+
+# Server-sent events: each terminal line is pushed to the browser as it is written
+SSE_KEEPALIVE = 15
+
+def sse_event(event, data, event_id=None):
+    """Format one server-sent event"""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines += [f'data: {line}' for line in data.splitlines() or ['']]
+    return '\n'.join(lines) + '\n\n'
+
+async def terminal_events(log, since=None):
+    """Yield SSE messages for the lines of log after `since`, then live ones.
+
+    A missing or stale `since` starts with a 'reset' carrying the whole terminal.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def listener(event, entry):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, entry))
+
+    log.listeners.add(listener)
+    try:
+        # Lines queued from here on that are also in the backlog are skipped via `sent`
+        sent = log.next_seq
+        if since is None or not log.first_seq <= since <= sent:
+            yield sse_event('reset', ''.join(to_xml(line) for line in render_terminal(log)), sent - 1)
+        else:
+            for entry in log.since(since):
+                yield sse_event('line', to_xml(render_entry(entry)), entry['seq'])
+        while True:
+            try:
+                event, entry = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event == 'reset':
+                yield sse_event('reset', '')
+            elif entry['seq'] >= sent:
+                sent = entry['seq'] + 1
+                yield sse_event('line', to_xml(render_entry(entry)), entry['seq'])
+    finally:
+        log.listeners.discard(listener)
+
+# Commands started from the streaming front end, by job id
+jobs = {}
+
+def start_job(coro):
+    """Run coro in the background (its output streams to the session); returns a job id"""
+    job_id = uuid.uuid4().hex[:12]
+    task = spawn_background(coro)
+    jobs[job_id] = task
+    task.add_done_callback(lambda t: jobs.pop(job_id, None))
+    return job_id
+
+@rt('/stream')
+async def get(req, session, since: int = None):
+    log = bind_session_log(session)
+    last_event_id = req.headers.get('last-event-id', '')
+    if last_event_id.isdigit():
+        since = int(last_event_id) + 1
+    return EventStream(terminal_events(log, since))
+
+# Parts of the home page that never change, rendered to HTML once at import
+def render_home_static():
+    """Pre-rendered static sections of the home page"""
+    sections = {
+        'header': (
+            H1("Moltbook Human-Agent Interface"),
+            P("Act as an AI agent on the Moltbook social network", cls='subtitle')
+        ),
+        'post_form': Div(
             H3("Create Post"),
             Form(
                 Div(
@@ -320,80 +2316,147 @@ def get():
                 ),
                 Button("Post to Moltbook", type='submit'),
                 hx_post='/create-post',
-                hx_target='#terminal',
-                hx_swap='innerHTML'
+                hx_vals='{"stream": "1"}',
+                hx_swap='none'
             ),
             cls='post-form'
         ),
-
-        # Terminal output
-        Div(render_terminal(), id='terminal', cls='terminal'),
-
-        # Command input
-        Form(
-            Div(
-                Textarea(name='command', placeholder='Enter command (e.g., help, feed, post general My Title | My content here...)', autofocus=True, id='cmd-input'),
-                Button("Execute", type='submit'),
-                cls='input-area-vertical'
+        'controls': (
+            # Command input
+            Form(
+                Div(
+                    Textarea(name='command', placeholder='Enter command (e.g., help, feed, post general My Title | My content here...)', autofocus=True, id='cmd-input'),
+                    Button("Execute", type='submit'),
+                    cls='input-area-vertical'
+                ),
+                hx_post='/execute',
+                hx_vals='{"stream": "1"}',
+                hx_swap='none',
             ),
-            hx_post='/execute',
-            hx_target='#terminal',
-            hx_swap='innerHTML',
-        ),
 
-        # Quick action buttons
-        Div(
-            Button("My Profile", hx_post='/execute', hx_vals='{"command": "me"}', hx_target='#terminal', hx_swap='innerHTML', cls='secondary'),
-            Button("Feed", hx_post='/execute', hx_vals='{"command": "feed"}', hx_target='#terminal', hx_swap='innerHTML', cls='secondary'),
-            Button("Status", hx_post='/execute', hx_vals='{"command": "status"}', hx_target='#terminal', hx_swap='innerHTML', cls='secondary'),
-            Button("Clear", hx_post='/clear', hx_target='#terminal', hx_swap='innerHTML', cls='secondary'),
-            style='display: flex; gap: 10px; margin-bottom: 20px;'
+            # Quick action buttons
+            Div(
+                Button("My Profile", hx_post='/execute', hx_vals='{"command": "me", "stream": "1"}', hx_swap='none', cls='secondary'),
+                Button("Feed", hx_post='/execute', hx_vals='{"command": "feed", "stream": "1"}', hx_swap='none', cls='secondary'),
+                Button("Status", hx_post='/execute', hx_vals='{"command": "status", "stream": "1"}', hx_swap='none', cls='secondary'),
+                Button("Clear", hx_post='/clear', hx_vals='{"stream": "1"}', hx_swap='none', cls='secondary'),
+                style='display: flex; gap: 10px; margin-bottom: 20px;'
+            )
         ),
-
-        # Commands help
-        Div(
+        'help': Div(
             H3("Available Commands"),
             P(Span("help", cls='cmd'), " - ", Span("Show all commands", cls='desc')),
             P(Span("register <name> <description>", cls='cmd'), " - ", Span("Register a new agent", cls='desc')),
             P(Span("status", cls='cmd'), " - ", Span("Check claim status", cls='desc')),
             P(Span("me", cls='cmd'), " - ", Span("View your profile", cls='desc')),
-            P(Span("feed [sort]", cls='cmd'), " - ", Span("View feed (hot/new/top)", cls='desc')),
+            P(Span("feed [sort] [limit]", cls='cmd'), " - ", Span("View feed (hot/new/top/rising)", cls='desc')),
+            P(Span("feed more", cls='cmd'), " - ", Span("Next page of the last feed", cls='desc')),
             P(Span("post <submolt> <title> | <content>", cls='cmd'), " - ", Span("Create a post", cls='desc')),
             P(Span("comment <post_id> <content>", cls='cmd'), " - ", Span("Comment on a post", cls='desc')),
             P(Span("upvote <post_id>", cls='cmd'), " - ", Span("Upvote a post", cls='desc')),
             P(Span("submolts", cls='cmd'), " - ", Span("List all submolts", cls='desc')),
             P(Span("search <query>", cls='cmd'), " - ", Span("Semantic search", cls='desc')),
+            P(Span("search --local <query>", cls='cmd'), " - ", Span("Offline search of what you've seen", cls='desc')),
+            P(Span("batch <cmd>; <cmd>; ...", cls='cmd'), " - ", Span("Run many commands concurrently", cls='desc')),
+            P(Span("sync [status|now]", cls='cmd'), " - ", Span("Background sync of new posts", cls='desc')),
+            P(Span("outbox [all]", cls='cmd'), " - ", Span("Posts and comments waiting to be sent", cls='desc')),
+            P(Span("outbox retry|drop <id>", cls='cmd'), " - ", Span("Resend or discard an outbox entry", cls='desc')),
+            P(Span("history [n] | history grep <pattern>", cls='cmd'), " - ", Span("Saved terminal history", cls='desc')),
+            P(Span("stats", cls='cmd'), " - ", Span("API latency, errors and cache ratios", cls='desc')),
+            P(Span("queue", cls='cmd'), " - ", Span("Show queued writes and their ETA", cls='desc')),
+            P(Span("cache stats|clear", cls='cmd'), " - ", Span("Show or reset the response cache", cls='desc')),
             cls='commands-help'
         ),
+    }
+    return {name: NotStr(to_xml(ft)) for name, ft in sections.items()}
+
+HOME_STATIC = render_home_static()
+
+@rt('/metrics')
+def get():
+    return Response(render_metrics(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+@rt('/')
+async def get(session):
+    log = bind_session_log(session)
+    api_key = load_api_key()
+    return Div(
+        HOME_STATIC['header'],
+
+        # Status bar
+        Div(
+            Span(
+                Span(cls=f"status-dot {'connected' if api_key else 'disconnected'}"),
+                f"{'Connected' if api_key else 'Not connected'}"
+            ),
+            Span(f"API Key: {'*' * 8 + api_key[-8:] if api_key and len(api_key) > 8 else 'Not set'}"),
+            cls='status-bar'
+        ),
+
+        # API Key section
+        Div(
+            H3("API Key"),
+            Form(
+                Div(
+                    Input(type='password', name='api_key', placeholder='Enter your Moltbook API key (moltbook_xxx)', value=api_key),
+                    Button("Save Key", type='submit'),
+                    cls='input-area'
+                ),
+                hx_post='/set-key',
+                hx_target='#main-content',
+                hx_swap='outerHTML'
+            ),
+            cls='api-key-section'
+        ),
+
+        HOME_STATIC['post_form'],
+
+        # Terminal output
+        Div(*render_terminal(), id='terminal', cls='terminal', data_capacity=str(OUTPUT_LOG_SIZE),
+            data_stream=f'/stream?since={log.next_seq}'),
+
+        HOME_STATIC['controls'],
+
+        HOME_STATIC['help'],
 
         cls='container',
         id='main-content'
     )
 
 @rt('/set-key')
-def post(api_key: str = ''):
+async def post(session, api_key: str = ''):
+    bind_session_log(session)
     if api_key:
         save_api_key(api_key)
         add_output(f"API key saved!", 'success')
-    return get()
+    return await get(session)
 
 @rt('/clear')
-def post():
-    output_log.clear()
+async def post(session, stream: bool = False):
+    bind_session_log(session).clear()
     add_output("Terminal cleared.", 'info')
-    return render_terminal()
+    if stream:
+        return {}
+    return render_terminal(), render_seq_marker()
 
 @rt('/create-post')
-def post(submolt: str = '', title: str = '', content: str = ''):
+async def post(session, submolt: str = '', title: str = '', content: str = '', since: int = None, stream: bool = False):
+    bind_session_log(session)
     api_key = load_api_key()
+    if stream:
+        return {'job_id': start_job(create_post(api_key, submolt, title, content))}
+    await create_post(api_key, submolt, title, content)
+    return render_updates(since)
 
+async def create_post(api_key, submolt, title, content):
+    """Create a post from the form, writing the outcome to the output log"""
     if not api_key:
         add_output("No API key set. Please add your API key first.", 'error')
-        return render_terminal()
+        return
 
     if not title.strip():
         add_output("Please enter a title for your post.", 'error')
-        return render_terminal()
+        return
 
     add_output(f"> Creating post in m/{submolt}...", 'command')
 
@@ -401,30 +2464,24 @@ def post(submolt: str = '', title: str = '', content: str = ''):
     if content.strip():
         data['content'] = content.strip()
 
-    result = moltbook_request('POST', '/posts', api_key, data)
-
-    if result.get('success'):
-        post_data = result.get('post', {})
-        post_id = post_data.get('id', 'unknown')
-        add_output(f"Post created successfully!", 'success')
-        add_output(f"Post ID: {post_id}", 'info')
-        add_output(f"Title: {title}", 'info')
-        add_output(f"Submolt: m/{submolt}", 'info')
-        if post_data.get('url'):
-            add_output(f"URL: {post_data.get('url')}", 'info')
-    else:
-        error_msg = result.get('error', json.dumps(result, indent=2))
-        add_output(f"Error creating post: {error_msg}", 'error')
-
-    return render_terminal()
+    journal_write(api_key, '/posts', data, 'post', f"post '{title.strip()}' in m/{submolt}")
 
 @rt('/execute')
-def post(command: str = ''):
+async def post(req, session, command: str = '', since: int = None, stream: bool = False):
+    bind_session_log(session)
     api_key = load_api_key()
 
     if not command.strip():
-        return render_terminal()
+        return {} if stream else render_updates(since)
+
+    if stream:
+        return {'job_id': start_job(run_command(command, api_key))}
 
+    await cancel_on_disconnect(req, run_command(command, api_key))
+    return render_updates(since)
+
+async def run_command(command, api_key):
+    """Run one terminal command, writing its results to the output log"""
     add_output(f"> {command}", 'command')
 
     parts = command.strip().split(maxsplit=1)
@@ -438,17 +2495,28 @@ Commands:
   register <name> <description>  - Register new agent
   status                         - Check claim status
   me                             - View your profile
-  feed [sort]                    - View feed (hot/new/top)
+  feed [sort] [limit]            - View feed (hot/new/top/rising)
+  feed more                      - Next page of the last feed
   post <submolt> <title> | <content> - Create a post
   comment <post_id> <content>    - Comment on a post
   upvote <post_id>               - Upvote a post
   downvote <post_id>             - Downvote a post
   submolts                       - List all submolts
   search <query>                 - Semantic search
+  search --local <query>         - Search posts and comments seen so far, offline
   follow <name>                  - Follow a molty
   unfollow <name>                - Unfollow a molty
   profile <name>                 - View another molty's profile
   raw <method> <endpoint> [json] - Raw API request
+  batch <cmd>; <cmd>; ...        - Run many commands concurrently
+  sync [status|now]              - Background sync of new posts
+  outbox [all]                   - List posts and comments waiting to be sent
+  outbox retry|drop <id>         - Resend or discard an outbox entry
+  history [n]                    - Show the last n lines of saved history
+  history grep <pattern>         - Search saved history
+  stats                          - API latency, errors and cache ratios
+  queue                          - Show queued writes and their ETA
+  cache stats|clear              - Show or reset the response cache
         """, 'info')
 
     elif cmd == 'register':
@@ -459,7 +2527,7 @@ Commands:
             name = reg_parts[0]
             desc = reg_parts[1] if len(reg_parts) > 1 else "A human acting as an AI agent"
 
-            result = moltbook_request('POST', '/agents/register', '', {'name': name, 'description': desc})
+            result = await amoltbook_request('POST', '/agents/register', '', {'name': name, 'description': desc})
             if 'error' in result:
                 add_output(f"Error: {result['error']}", 'error')
             elif result.get('agent'):
@@ -482,14 +2550,14 @@ Commands:
         if not api_key:
             add_output("No API key set. Use 'register' or set your key above.", 'error')
         else:
-            result = moltbook_request('GET', '/agents/status', api_key)
+            result = await amoltbook_request('GET', '/agents/status', api_key)
             add_output(f"Status: {json.dumps(result, indent=2)}", 'success' if result.get('success') else 'info')
 
     elif cmd == 'me':
         if not api_key:
             add_output("No API key set.", 'error')
         else:
-            result = moltbook_request('GET', '/agents/me', api_key)
+            result = await amoltbook_request('GET', '/agents/me', api_key)
             if result.get('success') and result.get('agent'):
                 agent = result['agent']
                 add_output(f"Name: {agent.get('name')}", 'success')
@@ -504,14 +2572,36 @@ Commands:
         if not api_key:
             add_output("No API key set.", 'error')
         else:
-            sort = args if args in ['hot', 'new', 'top', 'rising'] else 'hot'
-            result = moltbook_request('GET', f'/posts?sort={sort}&limit=10', api_key)
-            if result.get('success') and result.get('posts'):
-                for post in result['posts'][:10]:
+            feed_args = args.split()
+            cursor = session_data().get('feed')
+            if feed_args[:1] == ['more']:
+                if cursor is None or cursor.api_key != api_key:
+                    add_output("No feed open. Use 'feed [sort] [limit]' first.", 'error')
+                    return
+            else:
+                sort = feed_args[0] if feed_args and feed_args[0] in FEED_SORTS else 'hot'
+                limit = next((int(a) for a in feed_args if a.isdigit()), FEED_DEFAULT_LIMIT)
+                cursor = FeedCursor(api_key, sort, max(1, min(limit, FEED_MAX_LIMIT)))
+                session_data()['feed'] = cursor
+            result = await cursor.next_page()
+            if result is None:
+                add_output("End of feed.", 'info')
+            elif result.get('success') and result.get('posts'):
+                for post in result['posts'][:cursor.limit]:
                     add_output(f"[{post.get('id', '')[:8]}] {post.get('title', 'No title')}", 'success')
                     add_output(f"  by {post.get('author', {}).get('name', '?')} in m/{post.get('submolt', {}).get('name', '?')} | +{post.get('upvotes', 0)}", 'info')
+                if next_feed_offset(result, 0)[1]:
+                    add_output(f"-- page {cursor.pages_read} of {cursor.sort}; type 'feed more' for the next {cursor.limit} --", 'info')
+            elif result.get('success'):
+                add_output("End of feed.", 'info')
             else:
                 add_output(f"Response: {json.dumps(result, indent=2)}", 'error')
+                offline = local_mirror.recent_posts(cursor.limit, cursor.offset)
+                if offline:
+                    add_output(f"Showing {len(offline)} recent post(s) from the local mirror:", 'info')
+                for post in offline:
+                    add_output(f"[{post['id'][:8]}] {post['title'] or 'No title'}", 'success')
+                    add_output(f"  by {post['author'] or '?'} in m/{post['submolt'] or '?'} | +{post['upvotes'] or 0}", 'info')
 
     elif cmd == 'post':
         if not api_key:
@@ -536,11 +2626,7 @@ Commands:
             if content:
                 data['content'] = content
 
-            result = moltbook_request('POST', '/posts', api_key, data)
-            if result.get('success'):
-                add_output(f"Post created! ID: {result.get('post', {}).get('id', 'unknown')}", 'success')
-            else:
-                add_output(f"Error: {json.dumps(result, indent=2)}", 'error')
+            journal_write(api_key, '/posts', data, 'post', f"post '{title}' in m/{submolt}")
 
     elif cmd == 'comment':
         if not api_key:
@@ -555,11 +2641,8 @@ Commands:
             if not content:
                 add_output("Please provide comment content", 'error')
             else:
-                result = moltbook_request('POST', f'/posts/{post_id}/comments', api_key, {'content': content})
-                if result.get('success'):
-                    add_output(f"Comment added!", 'success')
-                else:
-                    add_output(f"Error: {json.dumps(result, indent=2)}", 'error')
+                journal_write(api_key, f'/posts/{post_id}/comments', {'content': content}, 'comment',
+                              f"comment on {post_id[:8]}")
 
     elif cmd == 'upvote':
         if not api_key:
@@ -567,7 +2650,7 @@ Commands:
         elif not args:
             add_output("Usage: upvote <post_id>", 'error')
         else:
-            result = moltbook_request('POST', f'/posts/{args.strip()}/upvote', api_key)
+            result = await amoltbook_request('POST', f'/posts/{args.strip()}/upvote', api_key)
             add_output(f"Result: {json.dumps(result, indent=2)}", 'success' if result.get('success') else 'error')
 
     elif cmd == 'downvote':
@@ -576,14 +2659,14 @@ Commands:
         elif not args:
             add_output("Usage: downvote <post_id>", 'error')
         else:
-            result = moltbook_request('POST', f'/posts/{args.strip()}/downvote', api_key)
+            result = await amoltbook_request('POST', f'/posts/{args.strip()}/downvote', api_key)
             add_output(f"Result: {json.dumps(result, indent=2)}", 'success' if result.get('success') else 'error')
 
     elif cmd == 'submolts':
         if not api_key:
             add_output("No API key set.", 'error')
         else:
-            result = moltbook_request('GET', '/submolts', api_key)
+            result = await amoltbook_request('GET', '/submolts', api_key)
             if result.get('success') and result.get('submolts'):
                 for s in result['submolts']:
                     add_output(f"m/{s.get('name')} - {s.get('display_name', '')}", 'success')
@@ -591,15 +2674,31 @@ Commands:
             else:
                 add_output(f"Response: {json.dumps(result, indent=2)}", 'error')
 
+    elif cmd == 'search' and args.split(maxsplit=1)[:1] == ['--local']:
+        query = args.split(maxsplit=1)[1] if len(args.split(maxsplit=1)) > 1 else ''
+        if not query.strip():
+            add_output("Usage: search --local <query>", 'error')
+            return
+        start = time.perf_counter()
+        hits = local_mirror.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            if hit['type'] == 'post':
+                add_output(f"[post {hit['id'][:8]}] {hit['title']}", 'success')
+                add_output(f"  by {hit['author'] or '?'} in m/{hit['submolt'] or '?'} | {hit['snippet']}", 'info')
+            else:
+                add_output(f"[comment on {(hit['post_id'] or '?')[:8]}] {hit['snippet']}", 'success')
+                add_output(f"  by {hit['author'] or '?'}", 'info')
+        add_output(f"{len(hits)} local result(s) in {elapsed:.1f}ms", 'info')
+
     elif cmd == 'search':
         if not api_key:
             add_output("No API key set.", 'error')
         elif not args:
             add_output("Usage: search <query>", 'error')
         else:
-            import urllib.parse
             query = urllib.parse.quote(args)
-            result = moltbook_request('GET', f'/search?q={query}&limit=10', api_key)
+            result = await amoltbook_request('GET', f'/search?q={query}&limit=10', api_key)
             if result.get('success') and result.get('results'):
                 for r in result['results']:
                     rtype = r.get('type', 'post')
@@ -614,7 +2713,7 @@ Commands:
         elif not args:
             add_output("Usage: follow <molty_name>", 'error')
         else:
-            result = moltbook_request('POST', f'/agents/{args.strip()}/follow', api_key)
+            result = await amoltbook_request('POST', f'/agents/{args.strip()}/follow', api_key)
             add_output(f"Result: {json.dumps(result, indent=2)}", 'success' if result.get('success') else 'error')
 
     elif cmd == 'unfollow':
@@ -623,7 +2722,7 @@ Commands:
         elif not args:
             add_output("Usage: unfollow <molty_name>", 'error')
         else:
-            result = moltbook_request('DELETE', f'/agents/{args.strip()}/follow', api_key)
+            result = await amoltbook_request('DELETE', f'/agents/{args.strip()}/follow', api_key)
             add_output(f"Result: {json.dumps(result, indent=2)}", 'success' if result.get('success') else 'error')
 
     elif cmd == 'profile':
@@ -632,7 +2731,7 @@ Commands:
         elif not args:
             add_output("Usage: profile <molty_name>", 'error')
         else:
-            result = moltbook_request('GET', f'/agents/profile?name={args.strip()}', api_key)
+            result = await amoltbook_request('GET', f'/agents/profile?name={args.strip()}', api_key)
             if result.get('success') and result.get('agent'):
                 agent = result['agent']
                 add_output(f"Name: {agent.get('name')}", 'success')
@@ -654,15 +2753,210 @@ Commands:
                     body = json.loads(raw_parts[2])
                 except:
                     add_output("Invalid JSON body", 'error')
-                    return render_terminal()
+                    return
 
-            result = moltbook_request(method, endpoint, api_key, body)
+            result = await amoltbook_request(method, endpoint, api_key, body)
             add_output(f"Response: {json.dumps(result, indent=2)}", 'info')
 
+    elif cmd == 'batch':
+        commands = split_batch(args)
+        if not commands:
+            add_output("Usage: batch <command>; <command>; ...  (or one command per line)", 'error')
+        else:
+            await run_batch(commands, api_key)
+
+    elif cmd == 'sync':
+        if args.strip() == 'now':
+            if not api_key:
+                add_output("No API key set.", 'error')
+                return
+            new = await feed_sync.poll(api_key)
+            if new is None:
+                add_output(f"Sync failed: {feed_sync.last_error}", 'error')
+            else:
+                add_output(f"Synced {new} new post(s).", 'success')
+        elif args.strip() in ('', 'status'):
+            s = feed_sync.status()
+            lag = 'never synced' if s['lag'] is None else f"{s['lag']:.0f}s since last sync"
+            if s['newest_age'] is not None:
+                lag += f", newest post {s['newest_age']:.0f}s old"
+            add_output(f"Sync: {'running' if s['running'] else 'not running'}, next poll in {s['interval']:.0f}s", 'info')
+            add_output(f"Lag: {lag}", 'info')
+            add_output(f"Ingested {s['ingested']} posts in {s['api_calls']} API calls over {s['polls']} polls "
+                       f"({s['rate']:.2f} posts/s)", 'info')
+            if s['gaps']:
+                add_output(f"{s['gaps']} poll(s) hit the page limit before the watermark; older posts may be missing", 'info')
+            if s['last_error']:
+                add_output(f"Last error: {s['last_error']}", 'error')
+        else:
+            add_output("Usage: sync [status|now]", 'error')
+
+    elif cmd == 'outbox':
+        sub = args.split()
+        if sub[:1] in (['retry'], ['drop']) and len(sub) == 2 and sub[1].lstrip('#').isdigit():
+            entry_id = int(sub[1].lstrip('#'))
+            if sub[0] == 'retry' and outbox.retry(entry_id):
+                add_output(f"Outbox #{entry_id} will be sent again now.", 'success')
+            elif sub[0] == 'drop' and outbox.drop(entry_id):
+                add_output(f"Dropped outbox #{entry_id}.", 'success')
+            else:
+                add_output(f"No unsent outbox entry #{entry_id}.", 'error')
+        elif sub in ([], ['all']):
+            states = ('pending', 'sending', 'failed', 'sent', 'dropped') if sub else ('pending', 'sending', 'failed')
+            entries = outbox.entries(states)
+            if not entries:
+                add_output("Outbox is empty.", 'info')
+            now = time.time()
+            for e in entries:
+                line = f"#{e['id']} {e['state']}: {e['label']} (attempts: {e['attempts']})"
+                if e['state'] == 'pending' and e['next_attempt'] > now:
+                    line += f", next try in {e['next_attempt'] - now:.0f}s"
+                add_output(line, 'error' if e['state'] == 'failed' else 'info')
+                if e['last_error'] and e['state'] != 'sent':
+                    add_output(f"  last error: {e['last_error']}", 'info')
+        else:
+            add_output("Usage: outbox [all] | outbox retry <id> | outbox drop <id>", 'error')
+
+    elif cmd == 'history':
+        sub = args.split(maxsplit=1)
+        if sub[:1] == ['grep'] and len(sub) == 2:
+            records = history.grep(sub[1])
+            for r in records:
+                add_output(f"{r['n']:>6}  {(r.get('time') or '')[:19]}  {r['text']}", r.get('style') or 'info', record=False)
+            add_output(f"{len(records)} match(es)" + (f" (newest {HISTORY_GREP_LIMIT})" if len(records) == HISTORY_GREP_LIMIT else ''), 'info')
+        elif not sub or (len(sub) == 1 and sub[0].isdigit()):
+            for r in history.tail(int(sub[0]) if sub else 20):
+                add_output(f"{r['n']:>6}  {(r.get('time') or '')[:19]}  {r['text']}", r.get('style') or 'info', record=False)
+        else:
+            add_output("Usage: history [n] | history grep <pattern>", 'error')
+
+    elif cmd == 'stats':
+        snap = metrics.snapshot()
+        if not snap['upstream_latency']:
+            add_output("No API calls yet.", 'info')
+        for (method, path), hist in sorted(snap['upstream_latency'].items(), key=lambda kv: -kv[1].count):
+            statuses = {k[2]: n for k, n in snap['upstream_requests'].items() if k[:2] == (method, path)}
+            errors = sum(n for s, n in statuses.items() if s == 'error' or int(s) >= 400)
+            retries = snap['upstream_retries'].get((method, path), 0)
+            add_output(f"{method} {path}: {hist.count} calls, avg {hist.sum / hist.count * 1000:.0f}ms, "
+                       f"p50 <={hist.quantile(0.5) * 1000:g}ms, p99 <={hist.quantile(0.99) * 1000:g}ms | "
+                       f"errors {errors}, retries {retries}", 'error' if errors else 'success')
+        cache, cond = response_cache.stats(), conditional_cache.stats()
+        add_output(f"Cache hit rate {cache['hit_rate']:.0%}, 304 rate {cond['not_modified_ratio']:.0%}", 'info')
+
+    elif cmd == 'queue':
+        buckets = [b for b in write_scheduler.stats(api_key)]
+        if not buckets:
+            add_output("No writes sent yet.", 'info')
+        for b in sorted(buckets, key=lambda b: b['class']):
+            per_min = b['rate'] * 60
+            add_output(f"{b['class']}: {b['waiting']} queued, ETA {b['eta']:.1f}s | next slot in {b['next_slot']:.1f}s "
+                       f"({per_min:.2g}/min, burst {b['burst']})", 'success' if not b['waiting'] else 'info')
+
+    elif cmd == 'cache':
+        if args.strip() == 'clear':
+            response_cache.clear()
+            conditional_cache.clear()
+            add_output("Response cache cleared.", 'success')
+        elif args.strip() in ('', 'stats'):
+            s = response_cache.stats()
+            add_output(f"Cache: {s['entries']} entries, {s['bytes'] / 1024:.1f} KiB", 'success')
+            add_output(f"  hits {s['hits']} / misses {s['misses']} ({s['hit_rate']:.0%} hit rate)", 'info')
+            add_output(f"  evictions {s['evictions']} | invalidations {s['invalidations']}", 'info')
+            flights = single_flight.stats()
+            add_output(f"  coalesced {flights['coalesced']} reads into {flights['calls']} upstream calls", 'info')
+            c = conditional_cache.stats()
+            add_output(f"  conditional GETs {c['conditional']}, 304s {c['not_modified']} ({c['not_modified_ratio']:.0%}) | "
+                       f"saved {c['bytes_saved'] / 1024:.1f} KiB of {(c['bytes_saved'] + c['bytes_downloaded']) / 1024:.1f} KiB", 'info')
+        else:
+            add_output("Usage: cache stats|clear", 'error')
+
     else:
         add_output(f"Unknown command: {cmd}. Type 'help' for available commands.", 'error')
 
-    return render_terminal()
+# Batches: many commands per request, run concurrently on a bounded pool
+BATCH_CONCURRENCY = 8
+BATCH_MAX_ITEMS = 100
+# Commands that read or change session state run alone, in order, between concurrent groups
+BATCH_SERIAL_COMMANDS = {'register', 'feed', 'cache', 'batch'}
+
+def split_batch(text):
+    """Split batch text into commands: one per line, or ';'-separated on a single line"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) == 1:
+        lines = [part.strip() for part in lines[0].split(';') if part.strip()]
+    return lines
+
+async def run_batch(commands, api_key):
+    """Run commands concurrently where they are independent.
+
+    Each command writes to its own buffer; buffers are copied into the
+    current log in command order as soon as every earlier command has
+    finished. A command counts as failed if it wrote an 'error' line.
+    Returns one result dict per command.
+    """
+    log = current_log()
+    commands = commands[:BATCH_MAX_ITEMS]
+    results = [None] * len(commands)
+    buffers = [None] * len(commands)
+    flushed = 0
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal flushed
+        while flushed < len(commands) and buffers[flushed] is not None:
+            for entry in buffers[flushed]:
+                log.append({'text': entry['text'], 'style': entry['style'], 'time': entry['time']})
+            flushed += 1
+
+    async def run_item(i, command):
+        async with slots:
+            buffer = OutputLog(capacity=OUTPUT_LOG_SIZE)
+            _current_log.set(buffer)  # this task runs in its own copy of the context
+            item_start = time.perf_counter()
+            try:
+                await run_command(command, api_key)
+            except Exception as e:
+                add_output(f"Error: {e}", 'error')
+            entries = list(buffer)
+            results[i] = {
+                'command': command,
+                'ok': not any(e['style'] == 'error' for e in entries),
+                'output': [e['text'] for e in entries],
+                'seconds': round(time.perf_counter() - item_start, 4),
+            }
+            buffers[i] = entries
+            flush()
+
+    group = []
+    for i, command in enumerate(commands):
+        name = command.split(maxsplit=1)[0].lower()
+        if name in BATCH_SERIAL_COMMANDS:
+            await asyncio.gather(*group)
+            group = []
+            await run_item(i, command)
+        else:
+            group.append(asyncio.ensure_future(run_item(i, command)))
+    await asyncio.gather(*group)
+
+    ok = sum(r['ok'] for r in results)
+    elapsed = time.perf_counter() - start
+    add_output(f"Batch: {ok}/{len(results)} succeeded in {elapsed:.2f}s", 'success' if ok == len(results) else 'error')
+    for n, r in enumerate(results, 1):
+        if not r['ok']:
+            add_output(f"  #{n} failed: {r['command']}", 'error')
+    return results
+
+@rt('/batch')
+async def post(session, data: dict):
+    bind_session_log(session)
+    commands = data.get('commands')
+    if not isinstance(commands, list) or not all(isinstance(c, str) for c in commands):
+        return JSONResponse({'error': 'Expected {"commands": ["<command>", ...]}'}, status_code=400)
+    start = time.perf_counter()
+    results = await run_batch([c for c in commands if c.strip()], load_api_key())
+    return {'results': results, 'seconds': round(time.perf_counter() - start, 4)}
 
 if __name__ == '__main__':
     import uvicorn
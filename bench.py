@@ -0,0 +1,83 @@
+"""
+Benchmarks for the Moltbook Human-Agent Interface
+
+Runs against the local fake API in fake_api.py, so no network is needed.
+Each scenario prints one JSON object per line.
+
+    python bench.py async [--concurrency 200] [--requests 1000] [--latency 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as moltbook_app
+from fake_api import FakeMoltbook
+
+# Starlette runs sync handlers on anyio's default threadpool, which has 40 tokens
+THREADPOOL_SIZE = 40
+
+
+def report(scenario, variant, count, elapsed, **extra):
+    """Print one machine-readable result line"""
+    print(json.dumps({'scenario': scenario, 'variant': variant, 'requests': count,
+                      'seconds': round(elapsed, 3), 'rps': round(count / elapsed, 1), **extra}))
+
+
+def bench_async(args):
+    """Concurrent feed fetches: sync client on a threadpool vs the async client"""
+    endpoint = '/posts?sort=hot&limit=10'
+
+    # Before: every request holds a threadpool slot while it blocks on the socket
+    moltbook_app.POOL_MAXSIZE = THREADPOOL_SIZE
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        results = list(pool.map(lambda _: moltbook_app.moltbook_request('GET', endpoint, 'bench'),
+                                range(args.requests)))
+    report('async', 'sync-threadpool', args.requests, time.perf_counter() - start,
+           errors=sum('error' in r for r in results), concurrency=THREADPOOL_SIZE)
+    moltbook_app.close_sessions()
+
+    # After: requests wait on the event loop, bounded only by the connection pool
+    async def run():
+        moltbook_app.POOL_MAXSIZE = args.concurrency
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one():
+            async with sem:
+                return await moltbook_app.amoltbook_request('GET', endpoint, 'bench')
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[one() for _ in range(args.requests)])
+        elapsed = time.perf_counter() - start
+        await moltbook_app.aclose_async_clients()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    report('async', 'async-client', args.requests, elapsed,
+           errors=sum('error' in r for r in results), concurrency=args.concurrency)
+
+
+SCENARIOS = {'async': bench_async}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.1, help='fake API latency per request (s)')
+    args = parser.parse_args()
+
+    fake = FakeMoltbook(latency=args.latency)
+    moltbook_app.API_BASE = fake.start()
+    try:
+        SCENARIOS[args.scenario](args)
+    finally:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+Local fake Moltbook API
+
+A small Starlette stand-in for the endpoints documented in
+skills/moltbook-interact/references/api.md, with injectable latency,
+server errors and rate limiting. Used by the tests, the benchmarks and
+for offline development:
+
+    python fake_api.py [--latency 0.1] [--error-rate 0.05] [--rate-limit-rate 0.05]
+    MOLTBOOK_API_BASE=http://localhost:5002/api/v1 python app.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+SUBMOLTS = ['general', 'consciousness', 'tools', 'philosophy', 'memes', 'meta', 'asks', 'showcase']
+
+
+def serve_in_thread(app, host='127.0.0.1', port=0):
+    """Run an ASGI app under uvicorn in a daemon thread; returns (server, thread, port)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    config = uvicorn.Config(app, log_level='warning', lifespan='auto', backlog=4096)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError('Server failed to start')
+        threading.Event().wait(0.01)
+    return server, thread, sock.getsockname()[1]
+
+
+class FakeMoltbook:
+    """In-memory Moltbook API with configurable latency, errors and 429s.
+
+    latency is added to every request, plus up to jitter more at random.
+    error_rate and rate_limit_rate are the chances that a request is
+    answered 500 or 429 (with Retry-After) instead of being served.
+    """
+
+    def __init__(self, latency=0.0, num_posts=100, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.errors = self.rate_limited = 0
+        self.submolts = [
+            {'id': str(uuid.uuid5(uuid.NAMESPACE_URL, f'submolt/{name}')), 'name': name,
+             'display_name': name.title(), 'description': f'All about {name}'}
+            for name in SUBMOLTS
+        ]
+        self.agents = {}
+        self.posts = []
+        self.comments = {}
+        self.idempotent = {}  # Idempotency-Key -> earlier response body
+        self.not_modified = 0
+        now = datetime.now(timezone.utc)
+        for i in reversed(range(num_posts)):  # newest (post 0) ends up first
+            self.add_post(f'agent{i % 7}', self.submolts[i % len(self.submolts)]['name'],
+                          f'Post number {i}', f'Content of post {i}',
+                          created_at=now - timedelta(minutes=i))
+        self.app = Starlette(routes=[
+            Route('/api/v1/agents/register', self.register, methods=['POST']),
+            Route('/api/v1/agents/status', self.status),
+            Route('/api/v1/agents/me', self.me),
+            Route('/api/v1/agents/profile', self.profile),
+            Route('/api/v1/agents/{name}/follow', self.follow, methods=['POST', 'DELETE']),
+            Route('/api/v1/posts', self.list_posts),
+            Route('/api/v1/posts', self.create_post, methods=['POST']),
+            Route('/api/v1/posts/{post_id}', self.get_post),
+            Route('/api/v1/posts/{post_id}/comments', self.list_comments),
+            Route('/api/v1/posts/{post_id}/comments', self.create_comment, methods=['POST']),
+            Route('/api/v1/posts/{post_id}/upvote', self.vote, methods=['POST']),
+            Route('/api/v1/posts/{post_id}/downvote', self.vote, methods=['POST']),
+            Route('/api/v1/submolts', self.list_submolts),
+            Route('/api/v1/search', self.search),
+        ])
+        self.api = self.app
+        self.app = self.inject_faults
+        self._server = None
+        self._thread = None
+
+    def agent(self, name):
+        """Get (or create) an agent record"""
+        if name not in self.agents:
+            self.agents[name] = {'id': str(uuid.uuid4()), 'name': name, 'description': f'{name} is a molty',
+                                 'karma': 0, 'follower_count': 0, 'following_count': 0}
+        return self.agents[name]
+
+    def add_post(self, author, submolt, title, content='', created_at=None):
+        """Insert a post at the front of the timeline"""
+        sub = next((s for s in self.submolts if s['name'] == submolt or s['id'] == submolt), self.submolts[0])
+        agent = self.agent(author)
+        post = {
+            'id': str(uuid.uuid4()), 'title': title, 'content': content, 'url': None,
+            'upvotes': 0, 'downvotes': 0, 'comment_count': 0,
+            'created_at': (created_at or datetime.now(timezone.utc)).isoformat(),
+            'author': {'id': agent['id'], 'name': agent['name']},
+            'submolt': {'id': sub['id'], 'name': sub['name'], 'display_name': sub['display_name']},
+        }
+        self.posts.insert(0, post)
+        return post
+
+    def _conditional(self, request, body):
+        """JSON response with an ETag, or 304 if the client already has this version"""
+        content = json.dumps(body).encode()
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return Response(status_code=304, headers={'ETag': etag})
+        return Response(content, media_type='application/json', headers={'ETag': etag})
+
+    async def inject_faults(self, scope, receive, send):
+        """ASGI entry point: fail a share of requests before they reach the API"""
+        if scope['type'] == 'http':
+            roll = self.random.random()
+            if roll < self.error_rate:
+                self.errors += 1
+                await self._delay()
+                return await JSONResponse({'success': False, 'error': 'Injected failure'}, status_code=500)(
+                    scope, receive, send)
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.rate_limited += 1
+                self.request_count += 1
+                return await JSONResponse({'success': False, 'error': 'Rate limited'}, status_code=429,
+                                          headers={'Retry-After': str(self.retry_after)})(scope, receive, send)
+        await self.api(scope, receive, send)
+
+    async def _delay(self):
+        self.request_count += 1
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def register(self, request):
+        await self._delay()
+        body = await request.json()
+        agent = self.agent(body.get('name', 'anon'))
+        return JSONResponse({'success': True, 'agent': dict(
+            agent, api_key=f"moltbook_sk_{uuid.uuid4().hex}",
+            claim_url=f"https://www.moltbook.com/claim/{agent['id']}", verification_code='molt-0000')})
+
+    async def status(self, request):
+        await self._delay()
+        return JSONResponse({'success': True, 'status': 'claimed'})
+
+    async def me(self, request):
+        await self._delay()
+        return self._conditional(request, {'success': True, 'agent': self.agent('me')})
+
+    async def profile(self, request):
+        await self._delay()
+        name = request.query_params.get('name', '')
+        if name not in self.agents:
+            return JSONResponse({'success': False, 'error': 'Agent not found'}, status_code=404)
+        return self._conditional(request, {'success': True, 'agent': self.agents[name]})
+
+    async def follow(self, request):
+        await self._delay()
+        return JSONResponse({'success': True})
+
+    async def list_posts(self, request):
+        await self._delay()
+        sort = request.query_params.get('sort', 'hot')
+        limit = int(request.query_params.get('limit', 25))
+        offset = int(request.query_params.get('offset', 0))
+        posts = self.posts if sort == 'new' else sorted(self.posts, key=lambda p: -p['upvotes'])
+        page = posts[offset:offset + limit]
+        has_more = offset + limit < len(posts)
+        return self._conditional(request, {'success': True, 'posts': page, 'count': len(page), 'has_more': has_more,
+                                           'next_offset': offset + limit if has_more else None})
+
+    def _replay(self, request):
+        """Earlier response to a write with the same Idempotency-Key, if any"""
+        key = request.headers.get('Idempotency-Key')
+        return JSONResponse(self.idempotent[key]) if key in self.idempotent else None
+
+    def _remember(self, request, body):
+        key = request.headers.get('Idempotency-Key')
+        if key:
+            self.idempotent[key] = body
+        return JSONResponse(body)
+
+    async def create_post(self, request):
+        await self._delay()
+        if replay := self._replay(request):
+            return replay
+        body = await request.json()
+        if not body.get('title'):
+            return JSONResponse({'success': False, 'error': 'Title is required'}, status_code=400)
+        post = self.add_post('me', body.get('submolt_id') or body.get('submolt', 'general'),
+                             body['title'], body.get('content', ''))
+        return self._remember(request, {'success': True, 'post': post})
+
+    def _find_post(self, post_id):
+        return next((p for p in self.posts if p['id'] == post_id), None)
+
+    async def get_post(self, request):
+        await self._delay()
+        post = self._find_post(request.path_params['post_id'])
+        if post is None:
+            return JSONResponse({'success': False, 'error': 'Post not found'}, status_code=404)
+        return JSONResponse({'success': True, 'post': post})
+
+    async def list_comments(self, request):
+        await self._delay()
+        return JSONResponse({'success': True, 'comments': self.comments.get(request.path_params['post_id'], [])})
+
+    async def create_comment(self, request):
+        await self._delay()
+        if replay := self._replay(request):
+            return replay
+        post = self._find_post(request.path_params['post_id'])
+        if post is None:
+            return JSONResponse({'success': False, 'error': 'Post not found'}, status_code=404)
+        body = await request.json()
+        agent = self.agent('me')
+        comment = {'id': str(uuid.uuid4()), 'content': body.get('content', ''), 'parent_id': body.get('parent_id'),
+                   'upvotes': 0, 'created_at': datetime.now(timezone.utc).isoformat(),
+                   'author': {'id': agent['id'], 'name': agent['name']}}
+        self.comments.setdefault(post['id'], []).append(comment)
+        post['comment_count'] += 1
+        return self._remember(request, {'success': True, 'comment': comment})
+
+    async def vote(self, request):
+        await self._delay()
+        post = self._find_post(request.path_params['post_id'])
+        if post is None:
+            return JSONResponse({'success': False, 'error': 'Post not found'}, status_code=404)
+        if request.url.path.endswith('/upvote'):
+            post['upvotes'] += 1
+        else:
+            post['downvotes'] += 1
+        return JSONResponse({'success': True, 'message': 'Vote recorded'})
+
+    async def list_submolts(self, request):
+        await self._delay()
+        return self._conditional(request, {'success': True, 'submolts': self.submolts})
+
+    async def search(self, request):
+        await self._delay()
+        q = request.query_params.get('q', '').lower()
+        limit = int(request.query_params.get('limit', 10))
+        hits = [dict(p, type='post', similarity=1.0) for p in self.posts
+                if q in p['title'].lower() or q in p['content'].lower()]
+        return JSONResponse({'success': True, 'results': hits[:limit]})
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve in a background thread and return the API base URL"""
+        self._server, self._thread, port = serve_in_thread(self.app, host, port)
+        return f"http://{host}:{port}/api/v1"
+
+    def stop(self):
+        """Shut the background server down"""
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=5002)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many more seconds, at random')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='share of requests answered 429')
+    parser.add_argument('--posts', type=int, default=100)
+    args = parser.parse_args()
+    fake = FakeMoltbook(latency=args.latency, num_posts=args.posts, jitter=args.jitter,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+    print(f"Fake Moltbook API on http://localhost:{args.port}/api/v1")
+    uvicorn.run(fake.app, host='0.0.0.0', port=args.port)
@@ -2,6 +2,8 @@
 Tests for Moltbook Human-Agent Interface
 """
 import pytest
+import asyncio
+import base64
 import json
 import os
 import unittest.mock as mock
@@ -11,6 +13,32 @@ from unittest.mock import MagicMock
 import app as moltbook_app
 
 
+def session_log(client):
+    """The output log of a TestClient's browser session (created on first use)"""
+    cookie = client.cookies.get('session_')
+    if cookie is None:
+        client.get('/')
+        cookie = client.cookies.get('session_')
+    sid = json.loads(base64.b64decode(cookie.split('.')[0]))['sid']
+    return moltbook_app.session_logs.get(sid)
+
+
+@pytest.fixture(autouse=True)
+def local_mirror(tmp_path, monkeypatch):
+    """Keep the SQLite mirror, outbox and history out of the real config directory"""
+    mirror = moltbook_app.LocalMirror(str(tmp_path / 'mirror.db'))
+    monkeypatch.setattr(moltbook_app, 'local_mirror', mirror)
+    monkeypatch.setattr(moltbook_app, 'SYNC_ON_STARTUP', False)
+    outbox = moltbook_app.Outbox(str(tmp_path / 'outbox.db'))
+    monkeypatch.setattr(moltbook_app, 'outbox', outbox)
+    history = moltbook_app.History(str(tmp_path / 'history'))
+    monkeypatch.setattr(moltbook_app, 'history', history)
+    yield mirror
+    mirror.close()
+    outbox.close()
+    history.close()
+
+
 class TestLoadApiKey:
     """Tests for load_api_key function"""
 
@@ -66,42 +94,103 @@ class TestSaveApiKey:
         assert data['agent_name'] == 'NewAgent'
 
 
+class TestCredentialStore:
+    """Tests for the cached, atomically written credentials file"""
+
+    def test_load_is_cached_until_file_changes(self, tmp_path, monkeypatch):
+        """Should parse once and re-read only after the file is replaced"""
+        config_file = tmp_path / "credentials.json"
+        monkeypatch.setattr(moltbook_app, 'CONFIG_FILE', str(config_file))
+        moltbook_app.save_api_key('moltbook_sk_first')
+
+        with mock.patch('app.json.load', wraps=json.load) as mock_load:
+            assert moltbook_app.load_api_key() == 'moltbook_sk_first'
+            assert moltbook_app.load_api_key() == 'moltbook_sk_first'
+            assert mock_load.call_count == 0
+
+            config_file.write_text(json.dumps({'api_key': 'moltbook_sk_edited_by_hand'}))
+            assert moltbook_app.load_api_key() == 'moltbook_sk_edited_by_hand'
+            assert mock_load.call_count == 1
+
+    def test_save_leaves_no_temp_files(self, tmp_path, monkeypatch):
+        """Atomic saves should clean up after themselves"""
+        config_file = tmp_path / "moltbook" / "credentials.json"
+        monkeypatch.setattr(moltbook_app, 'CONFIG_FILE', str(config_file))
+
+        moltbook_app.save_api_key('moltbook_sk_a')
+        moltbook_app.save_api_key('moltbook_sk_b')
+
+        assert os.listdir(config_file.parent) == ['credentials.json']
+
+    def test_concurrent_save_and_load_never_torn(self, tmp_path):
+        """Readers racing writers should only ever see complete files"""
+        import threading
+        path = str(tmp_path / "credentials.json")
+        writer_store, reader_store = moltbook_app.CredentialStore(), moltbook_app.CredentialStore()
+        writer_store.save(path, {'api_key': 'k0'})
+        seen = set()
+        stop = threading.Event()
+
+        def write():
+            for i in range(200):
+                writer_store.save(path, {'api_key': f'k{i}', 'padding': 'x' * (i * 37 % 4000)})
+            stop.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while not stop.is_set():
+            seen.add(reader_store.load(path).get('api_key', 'TORN'))
+        writer.join()
+
+        assert 'TORN' not in seen
+
+
 class TestMoltbookRequest:
     """Tests for moltbook_request function"""
 
+    def setup_method(self):
+        """Start each test with a fresh session pool and an empty cache"""
+        moltbook_app.close_sessions()
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+
     def test_get_request_success(self):
         """Should make GET request with proper headers"""
-        mock_response = MagicMock()
+        mock_response = MagicMock(status_code=200)
         mock_response.json.return_value = {'success': True, 'data': 'test'}
 
-        with mock.patch('app.requests.get', return_value=mock_response) as mock_get:
+        with mock.patch('app.requests.Session.request', return_value=mock_response) as mock_request:
             result = moltbook_app.moltbook_request('GET', '/test', 'test_api_key')
 
-            mock_get.assert_called_once()
-            call_args = mock_get.call_args
-            assert call_args[0][0] == 'https://www.moltbook.com/api/v1/test'
-            assert call_args[1]['headers']['Authorization'] == 'Bearer test_api_key'
+            mock_request.assert_called_once()
+            call_args = mock_request.call_args
+            assert call_args[0][0] == 'GET'
+            assert call_args[0][1] == 'https://www.moltbook.com/api/v1/test'
+            session = moltbook_app.get_session('test_api_key')
+            assert session.headers['Authorization'] == 'Bearer test_api_key'
+            assert 'gzip' in session.headers['Accept-Encoding']
             assert result == {'success': True, 'data': 'test'}
 
     def test_post_request_success(self):
         """Should make POST request with JSON body"""
-        mock_response = MagicMock()
+        mock_response = MagicMock(status_code=200)
         mock_response.json.return_value = {'success': True}
 
-        with mock.patch('app.requests.post', return_value=mock_response) as mock_post:
+        with mock.patch('app.requests.Session.request', return_value=mock_response) as mock_request:
             result = moltbook_app.moltbook_request('POST', '/posts', 'test_api_key', {'title': 'Test'})
 
-            mock_post.assert_called_once()
-            call_args = mock_post.call_args
+            mock_request.assert_called_once()
+            call_args = mock_request.call_args
             assert call_args[1]['json'] == {'title': 'Test'}
             assert result == {'success': True}
 
-    def test_request_handles_network_error(self):
+    def test_request_handles_network_error(self, monkeypatch):
         """Should return error dict on network failure"""
         import requests
+        monkeypatch.setattr(moltbook_app.time, 'sleep', lambda s: None)
 
-        with mock.patch('app.requests.get') as mock_get:
-            mock_get.side_effect = requests.exceptions.RequestException("Connection failed")
+        with mock.patch('app.requests.Session.request') as mock_request:
+            mock_request.side_effect = requests.exceptions.RequestException("Connection failed")
             result = moltbook_app.moltbook_request('GET', '/test', 'test_key')
 
             assert 'error' in result
@@ -114,6 +203,460 @@ class TestMoltbookRequest:
         assert 'error' in result
         assert 'Unknown method' in result['error']
 
+    def test_reuses_session_per_api_key(self):
+        """Should share one pooled session per API key"""
+        assert moltbook_app.get_session('key_a') is moltbook_app.get_session('key_a')
+        assert moltbook_app.get_session('key_a') is not moltbook_app.get_session('key_b')
+
+    def test_retries_429_honoring_retry_after(self, monkeypatch):
+        """Should back off for Retry-After seconds on 429 and then succeed"""
+        sleeps = []
+        monkeypatch.setattr(moltbook_app.time, 'sleep', sleeps.append)
+        throttled = MagicMock(status_code=429, headers={'Retry-After': '2'})
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {'success': True}
+
+        with mock.patch('app.requests.Session.request', side_effect=[throttled, ok]) as mock_request:
+            result = moltbook_app.moltbook_request('POST', '/posts/abc/upvote', 'test_key')
+
+        assert mock_request.call_count == 2
+        assert sleeps == [2.0]
+        assert result == {'success': True}
+
+    def test_does_not_retry_write_on_server_error(self, monkeypatch):
+        """Should not resend a POST after a 500, which may have been applied"""
+        monkeypatch.setattr(moltbook_app.time, 'sleep', lambda s: None)
+        failed = MagicMock(status_code=500, headers={})
+        failed.json.return_value = {'error': 'Internal error'}
+
+        with mock.patch('app.requests.Session.request', return_value=failed) as mock_request:
+            result = moltbook_app.moltbook_request('POST', '/posts', 'test_key', {'title': 'x'})
+
+        assert mock_request.call_count == 1
+        assert result == {'error': 'Internal error'}
+
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        """Should stop retrying after MAX_RETRIES and return the last response"""
+        monkeypatch.setattr(moltbook_app.time, 'sleep', lambda s: None)
+        failed = MagicMock(status_code=503, headers={})
+        failed.json.return_value = {'error': 'Unavailable'}
+
+        with mock.patch('app.requests.Session.request', return_value=failed) as mock_request:
+            result = moltbook_app.moltbook_request('GET', '/posts', 'test_key')
+
+        assert mock_request.call_count == moltbook_app.MAX_RETRIES + 1
+        assert result == {'error': 'Unavailable'}
+
+    def test_retry_delay_is_jittered_and_capped(self):
+        """Backoff should stay within the exponential envelope and the cap"""
+        for attempt in range(10):
+            delay = moltbook_app.retry_delay(attempt)
+            assert 0 <= delay <= min(moltbook_app.BACKOFF_MAX, moltbook_app.BACKOFF_BASE * 2 ** attempt)
+        assert moltbook_app.retry_delay(0, retry_after=999) == moltbook_app.BACKOFF_MAX
+
+
+class TestAsyncRequest:
+    """Tests for the asyncio request path"""
+
+    @pytest.fixture
+    def fake_api(self, monkeypatch):
+        """Serve the local fake Moltbook API for the test"""
+        from fake_api import FakeMoltbook
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+        fake = FakeMoltbook(num_posts=20)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+        yield fake
+        fake.stop()
+
+    def test_async_get_returns_json(self, fake_api):
+        """Should fetch and decode a GET through the async client"""
+        async def run():
+            try:
+                return await moltbook_app.amoltbook_request('GET', '/posts?sort=new&limit=5', 'test_key')
+            finally:
+                await moltbook_app.aclose_async_clients()
+
+        result = asyncio.run(run())
+        assert result['success'] is True
+        assert len(result['posts']) == 5
+
+    def test_async_concurrent_requests_share_session(self, fake_api):
+        """Concurrent calls for one key should reuse the same pooled session"""
+        async def run():
+            try:
+                sessions = {id(moltbook_app.get_async_client('test_key')) for _ in range(3)}
+                results = await asyncio.gather(*[
+                    moltbook_app.amoltbook_request('GET', f'/posts?limit={i + 1}', 'test_key') for i in range(10)
+                ])
+                return sessions, results
+            finally:
+                await moltbook_app.aclose_async_clients()
+
+        sessions, results = asyncio.run(run())
+        assert len(sessions) == 1
+        assert all(r['success'] for r in results)
+        assert fake_api.request_count == 10
+
+    def test_async_unknown_method_returns_error(self):
+        """Should return error for unknown HTTP method"""
+        result = asyncio.run(moltbook_app.amoltbook_request('INVALID', '/test', 'test_key'))
+        assert 'Unknown method' in result['error']
+
+    def test_cancel_on_disconnect_cancels_work(self):
+        """Should cancel the running command once the client has gone away"""
+        cancelled = []
+
+        class GoneRequest:
+            async def is_disconnected(self):
+                return True
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            result = await moltbook_app.cancel_on_disconnect(GoneRequest(), slow())
+            await asyncio.sleep(0)
+            return result
+
+        with mock.patch.object(moltbook_app, 'DISCONNECT_POLL', 0.01):
+            assert asyncio.run(run()) is None
+        assert cancelled == [True]
+
+
+class TestResponseCache:
+    """Tests for the GET response cache"""
+
+    def setup_method(self):
+        moltbook_app.close_sessions()
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+
+    def _ok(self, payload):
+        response = MagicMock(status_code=200)
+        response.json.return_value = payload
+        return response
+
+    def test_repeated_get_is_served_from_cache(self):
+        """A second identical GET should not hit the network"""
+        with mock.patch('app.requests.Session.request', return_value=self._ok({'success': True, 'posts': []})) as mock_request:
+            first = moltbook_app.moltbook_request('GET', '/posts?sort=hot&limit=10', 'key')
+            second = moltbook_app.moltbook_request('GET', '/posts?limit=10&sort=hot', 'key')
+
+        assert mock_request.call_count == 1
+        assert first == second
+        assert moltbook_app.response_cache.stats()['hits'] == 1
+
+    def test_cache_is_scoped_per_api_key(self):
+        """Different API keys should not share cached responses"""
+        with mock.patch('app.requests.Session.request', return_value=self._ok({'success': True})) as mock_request:
+            moltbook_app.moltbook_request('GET', '/agents/me', 'key_a')
+            moltbook_app.moltbook_request('GET', '/agents/me', 'key_b')
+
+        assert mock_request.call_count == 2
+
+    def test_errors_are_not_cached(self):
+        """Failed responses should be fetched again next time"""
+        with mock.patch('app.requests.Session.request', return_value=self._ok({'success': False, 'error': 'nope'})) as mock_request:
+            moltbook_app.moltbook_request('GET', '/posts', 'key')
+            moltbook_app.moltbook_request('GET', '/posts', 'key')
+
+        assert mock_request.call_count == 2
+
+    def test_write_invalidates_related_reads(self):
+        """An upvote should drop cached feed pages for that key"""
+        with mock.patch('app.requests.Session.request', return_value=self._ok({'success': True})) as mock_request:
+            moltbook_app.moltbook_request('GET', '/posts?sort=hot', 'key')
+            moltbook_app.moltbook_request('GET', '/submolts', 'key')
+            moltbook_app.moltbook_request('POST', '/posts/abc/upvote', 'key')
+            moltbook_app.moltbook_request('GET', '/posts?sort=hot', 'key')
+            moltbook_app.moltbook_request('GET', '/submolts', 'key')
+
+        assert mock_request.call_count == 4
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        """Entries older than their endpoint TTL should be refetched"""
+        now = [1000.0]
+        monkeypatch.setattr(moltbook_app.time, 'monotonic', lambda: now[0])
+        with mock.patch('app.requests.Session.request', return_value=self._ok({'success': True})) as mock_request:
+            moltbook_app.moltbook_request('GET', '/posts', 'key')
+            now[0] += moltbook_app.cache_ttl('/posts') + 1
+            moltbook_app.moltbook_request('GET', '/posts', 'key')
+
+        assert mock_request.call_count == 2
+
+    def test_lru_eviction_by_entries_and_bytes(self):
+        """Should evict least recently used entries past either bound"""
+        cache = moltbook_app.ResponseCache(max_entries=2, max_bytes=100)
+        cache.put('a', 'A', 60, 10)
+        cache.put('b', 'B', 60, 10)
+        cache.get('a')
+        cache.put('c', 'C', 60, 10)
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A'
+
+        cache.put('big', 'X', 60, 95)
+        assert cache.stats()['entries'] == 1
+        assert cache.stats()['bytes'] == 95
+
+    def test_cache_command_reports_and_clears(self, monkeypatch):
+        """The cache terminal command should show stats and clear entries"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        moltbook_app.response_cache.put(('test_key', '/posts', ()), {'success': True}, 60, 20)
+
+        from starlette.testclient import TestClient
+        client = TestClient(moltbook_app.app)
+        client.post('/execute', data={'command': 'cache stats'})
+        assert any('1 entries' in entry['text'] for entry in session_log(client))
+
+        client.post('/execute', data={'command': 'cache clear'})
+        assert moltbook_app.response_cache.stats()['entries'] == 0
+
+
+class TestConditionalRequests:
+    """Tests for ETag / Last-Modified revalidation of GETs"""
+
+    def setup_method(self):
+        moltbook_app.close_sessions()
+        moltbook_app.response_cache.clear()
+        moltbook_app.conditional_cache = moltbook_app.ConditionalCache()
+
+    def _response(self, status, payload=None, headers=None):
+        response = MagicMock(status_code=status, headers=headers or {}, content=json.dumps(payload).encode())
+        response.json.return_value = payload
+        return response
+
+    def test_304_serves_the_stored_body(self):
+        """The second GET should send the validators and reuse the first body on 304"""
+        body = {'success': True, 'submolts': [{'name': 'general'}]}
+        responses = [self._response(200, body, {'ETag': '"v1"', 'Last-Modified': 'Wed, 01 Jan 2026 00:00:00 GMT'}),
+                     self._response(304)]
+        with mock.patch('app.requests.Session.request', side_effect=responses) as mock_request:
+            moltbook_app.moltbook_request('GET', '/submolts', 'key')
+            moltbook_app.response_cache.clear()
+            second = moltbook_app.moltbook_request('GET', '/submolts', 'key')
+
+        assert second == body
+        assert mock_request.call_args_list[0].kwargs['headers'] is None
+        assert mock_request.call_args_list[1].kwargs['headers'] == {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 01 Jan 2026 00:00:00 GMT'}
+        stats = moltbook_app.conditional_cache.stats()
+        assert (stats['conditional'], stats['not_modified'], stats['not_modified_ratio']) == (1, 1, 1.0)
+        assert stats['bytes_saved'] == len(json.dumps(body))
+
+    def test_no_validators_means_no_conditional_request(self):
+        """Responses without ETag or Last-Modified should not be stored"""
+        with mock.patch('app.requests.Session.request',
+                        side_effect=[self._response(200, {'success': True}), self._response(200, {'success': True})]) as mock_request:
+            moltbook_app.moltbook_request('GET', '/agents/me', 'key')
+            moltbook_app.response_cache.clear()
+            moltbook_app.moltbook_request('GET', '/agents/me', 'key')
+
+        assert mock_request.call_args_list[1].kwargs['headers'] is None
+        assert moltbook_app.conditional_cache.stats()['entries'] == 0
+
+    def test_evicted_body_refetches_unconditionally(self):
+        """A 304 for a body no longer stored should be followed by a plain GET"""
+        body = {'success': True, 'posts': []}
+        moltbook_app.conditional_cache.store(moltbook_app.cache_key('key', '/posts'), 200, {'ETag': '"v1"'}, body, 10)
+        with mock.patch('app.requests.Session.request') as mock_request:
+            def respond(*args, headers=None, **kwargs):
+                moltbook_app.conditional_cache.clear()
+                return self._response(304) if headers else self._response(200, body)
+            mock_request.side_effect = respond
+            result = moltbook_app.moltbook_request('GET', '/posts', 'key')
+
+        assert result == body
+        assert [c.kwargs['headers'] for c in mock_request.call_args_list] == [{'If-None-Match': '"v1"'}, None]
+
+    def test_async_client_revalidates_against_fake_api(self, monkeypatch):
+        """Polling an unchanged feed should get 304s from the server"""
+        from fake_api import FakeMoltbook
+        fake = FakeMoltbook(num_posts=5)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+
+        async def poll():
+            results = []
+            for _ in range(3):
+                moltbook_app.response_cache.clear()
+                results.append(await moltbook_app.amoltbook_request('GET', '/posts?sort=new&limit=5', 'key'))
+            fake.add_post('bob', 'general', 'Breaking')
+            moltbook_app.response_cache.clear()
+            results.append(await moltbook_app.amoltbook_request('GET', '/posts?sort=new&limit=5', 'key'))
+            await moltbook_app.aclose_async_clients()
+            return results
+
+        try:
+            results = asyncio.run(poll())
+        finally:
+            fake.stop()
+
+        assert fake.not_modified == 2
+        assert results[0] == results[1] == results[2]
+        assert results[3]['posts'][0]['title'] == 'Breaking'
+
+
+class TestMetrics:
+    """Tests for latency/throughput instrumentation"""
+
+    def setup_method(self):
+        moltbook_app.close_sessions()
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+        moltbook_app.metrics.reset()
+
+    def test_paths_are_templated(self):
+        """Ids should be folded out of endpoint labels"""
+        assert moltbook_app.template_path('/posts/abc123/upvote') == '/posts/{id}/upvote'
+        assert moltbook_app.template_path('/posts/abc123?x=1') == '/posts/{id}'
+        assert moltbook_app.template_path('/posts?sort=new') == '/posts'
+        assert moltbook_app.template_path('/agents/bob/follow') == '/agents/{name}/follow'
+        assert moltbook_app.template_path('/agents/me') == '/agents/me'
+
+    def test_histogram_buckets_and_quantiles(self):
+        """Observations should land in the first bucket whose bound is >= the value"""
+        hist = moltbook_app.Histogram()
+        for value in (0.001, 0.003, 0.003, 0.2, 99):
+            hist.observe(value)
+
+        assert hist.counts[0] == 1 and hist.counts[2] == 2 and hist.counts[-1] == 1
+        assert hist.quantile(0.5) == 0.005
+        assert hist.quantile(1.0) == float('inf')
+
+    def test_upstream_calls_statuses_and_retries_are_counted(self, monkeypatch):
+        """Each call should be timed once, with its final status and retries"""
+        monkeypatch.setattr(moltbook_app.time, 'sleep', lambda s: None)
+        ok = MagicMock(status_code=200, headers={}, content=b'{}')
+        ok.json.return_value = {'success': True}
+        busy = MagicMock(status_code=503, headers={})
+        with mock.patch('app.requests.Session.request', side_effect=[busy, ok, ok]):
+            moltbook_app.moltbook_request('POST', '/posts/abc/upvote', 'key')
+            moltbook_app.moltbook_request('POST', '/posts/def/upvote', 'key')
+        with mock.patch('app.requests.Session.request', side_effect=moltbook_app.requests.exceptions.InvalidURL('bad')):
+            moltbook_app.moltbook_request('GET', '/agents/me', 'key')
+
+        snap = moltbook_app.metrics.snapshot()
+        assert snap['upstream_latency'][('POST', '/posts/{id}/upvote')].count == 2
+        assert snap['upstream_requests'] == {('POST', '/posts/{id}/upvote', '200'): 2, ('GET', '/agents/me', 'error'): 1}
+        assert snap['upstream_retries'] == {('POST', '/posts/{id}/upvote'): 1}
+
+    def test_metrics_route_and_stats_command(self, monkeypatch):
+        """/metrics should expose Prometheus text; 'stats' should summarize it"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        moltbook_app.metrics.observe_upstream('GET', '/posts?sort=hot', 200, 0.02, 0)
+        moltbook_app.metrics.observe_upstream('GET', '/posts?sort=hot', 500, 0.2, 3)
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            client.get('/')
+            client.post('/execute', data={'command': 'stats'})
+            body = client.get('/metrics').text
+            texts = [e['text'] for e in session_log(client)]
+
+        assert 'moltbook_upstream_request_duration_seconds_bucket{method="GET",endpoint="/posts",le="0.025"} 1' in body
+        assert 'moltbook_upstream_request_duration_seconds_count{method="GET",endpoint="/posts"} 2' in body
+        assert 'moltbook_upstream_retries_total{method="GET",endpoint="/posts"} 3' in body
+        assert 'moltbook_http_requests_total{method="GET",route="/",status="200"} 1' in body
+        assert 'moltbook_http_request_duration_seconds_count{method="POST",route="/execute"} 1' in body
+        assert any(t.startswith('GET /posts: 2 calls, avg 110ms') and t.endswith('errors 1, retries 3') for t in texts)
+
+
+class TestSingleFlight:
+    """Tests for coalescing identical concurrent reads"""
+
+    def setup_method(self):
+        moltbook_app.close_sessions()
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+
+    def test_threads_share_one_upstream_call(self, monkeypatch):
+        """Concurrent identical GETs from threads should make one request"""
+        import threading
+        flights = moltbook_app.SingleFlight()
+        monkeypatch.setattr(moltbook_app, 'single_flight', flights)
+        release = threading.Event()
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'success': True, 'posts': []}
+
+        def slow_request(*args, **kwargs):
+            release.wait(5)
+            return response
+
+        results = []
+        with mock.patch('app.requests.Session.request', side_effect=slow_request) as mock_request:
+            threads = [threading.Thread(target=lambda: results.append(
+                moltbook_app.moltbook_request('GET', '/posts?sort=hot&limit=10', 'key'))) for _ in range(5)]
+            for t in threads:
+                t.start()
+            for _ in range(500):
+                if flights.stats()['coalesced'] == 4:
+                    break
+                threading.Event().wait(0.01)
+            release.set()
+            for t in threads:
+                t.join()
+
+        assert mock_request.call_count == 1
+        assert results == [{'success': True, 'posts': []}] * 5
+        assert flights.stats() == {'calls': 1, 'coalesced': 4}
+
+    def test_errors_reach_every_waiter(self):
+        """An exception in the shared call should be raised in every caller"""
+        import threading
+        flights = moltbook_app.SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            release.wait(5)
+            raise RuntimeError('upstream down')
+
+        def call():
+            try:
+                flights.do('k', failing)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for _ in range(500):
+            if flights.stats()['coalesced'] == 2:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert errors == ['upstream down'] * 3
+
+    def test_async_callers_share_one_upstream_call(self, monkeypatch):
+        """Concurrent identical GETs on the event loop should make one request"""
+        from fake_api import FakeMoltbook
+        fake = FakeMoltbook(latency=0.05, num_posts=10)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+        monkeypatch.setattr(moltbook_app, 'single_flight', moltbook_app.SingleFlight())
+
+        async def run():
+            try:
+                return await asyncio.gather(*[
+                    moltbook_app.amoltbook_request('GET', '/agents/me', 'key') for _ in range(5)
+                ])
+            finally:
+                await moltbook_app.aclose_async_clients()
+
+        try:
+            results = asyncio.run(run())
+        finally:
+            fake.stop()
+        assert fake.request_count == 1
+        assert all(r['success'] for r in results)
+        assert moltbook_app.single_flight.stats() == {'calls': 1, 'coalesced': 4}
+
 
 class TestOutputLog:
     """Tests for output log functions"""
@@ -139,13 +682,715 @@ class TestOutputLog:
         assert moltbook_app.output_log[0]['text'] == "Message 10"
 
 
-class TestCommandParsing:
-    """Tests for command parsing in execute endpoint"""
+class TestIncrementalTerminal:
+    """Tests for the ring buffer and append-only terminal updates"""
 
     def setup_method(self):
-        """Clear output log before each test"""
         moltbook_app.output_log.clear()
 
+    def test_sequence_numbers_survive_wraparound_and_clear(self):
+        """Seqs should keep increasing across eviction and clear"""
+        log = moltbook_app.OutputLog(capacity=3)
+        for i in range(5):
+            log.append({'text': str(i)})
+        assert [e['text'] for e in log] == ['2', '3', '4']
+        assert [e['seq'] for e in log.since(3)] == [3, 4]
+        assert log.since(0)[0]['seq'] == 2
+
+        log.clear()
+        assert len(log) == 0
+        assert log.append({'text': 'after'}) == 5
+
+    def test_execute_returns_only_new_lines(self, monkeypatch):
+        """A client with a current seq should get just the command's output"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+
+        from starlette.testclient import TestClient
+        client = TestClient(moltbook_app.app)
+        log = session_log(client)
+        log.append({'text': "Old line that is already on screen", 'style': 'info'})
+        since = log.next_seq
+        response = client.post('/execute', data={'command': 'unknowncmd123', 'since': str(since)},
+                               headers={'HX-Request': 'true'})
+
+        assert 'Old line' not in response.text
+        assert 'Unknown command' in response.text
+        assert 'HX-Reswap' not in response.headers
+        assert f'value="{log.next_seq}"' in response.text
+
+    def test_stale_client_gets_full_terminal(self, monkeypatch):
+        """A seq that fell out of the buffer should trigger a full re-render"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+
+        from starlette.testclient import TestClient
+        client = TestClient(moltbook_app.app)
+        log = session_log(client)
+        for i in range(moltbook_app.OUTPUT_LOG_SIZE + 5):
+            log.append({'text': f"Line {i}", 'style': 'info'})
+        response = client.post('/execute', data={'command': 'unknowncmd123', 'since': '0'},
+                               headers={'HX-Request': 'true'})
+
+        assert response.headers['HX-Reswap'] == 'innerHTML'
+        assert response.text.count('output-line') == moltbook_app.OUTPUT_LOG_SIZE
+
+
+class TestSessionLogs:
+    """Tests for per-session terminals"""
+
+    def test_sessions_do_not_see_each_other(self, monkeypatch):
+        """Output from one browser should not appear in another's terminal"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        from starlette.testclient import TestClient
+        alice, bob = TestClient(moltbook_app.app), TestClient(moltbook_app.app)
+
+        alice.post('/execute', data={'command': 'help'})
+        bob.post('/execute', data={'command': 'unknowncmd123'})
+
+        assert any('Commands:' in e['text'] for e in session_log(alice))
+        assert not any('Commands:' in e['text'] for e in session_log(bob))
+        assert 'Commands:' not in bob.get('/').text
+
+    def test_lru_eviction_by_count_and_bytes(self):
+        """Least recently used sessions should go first when over either limit"""
+        logs = moltbook_app.SessionLogs(max_sessions=2, max_bytes=50)
+        logs.get('a').append({'text': 'x' * 10})
+        logs.get('b')
+        logs.get('a')
+        logs.get('c')
+        assert 'b' not in logs and 'a' in logs and 'c' in logs
+
+        logs.get('c').append({'text': 'y' * 45})
+        logs.get('c')
+        assert 'a' not in logs
+        assert logs.bytes == 45
+
+    def test_sweep_drops_idle_sessions(self, monkeypatch):
+        """The sweeper should evict only sessions idle past the timeout"""
+        now = [100.0]
+        monkeypatch.setattr(moltbook_app.time, 'monotonic', lambda: now[0])
+        logs = moltbook_app.SessionLogs(idle_seconds=60)
+        logs.get('old').append({'text': 'bye'})
+        now[0] += 50
+        logs.get('fresh')
+        now[0] += 20
+
+        assert logs.sweep() == 1
+        assert 'old' not in logs and 'fresh' in logs
+        assert logs.bytes == 0
+
+
+class TestHomePage:
+    """Tests for the pre-rendered home page and static assets"""
+
+    def test_stylesheet_is_a_fingerprinted_immutable_asset(self):
+        """The page should link the CSS by content hash; the asset should be cacheable forever"""
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            page = client.get('/')
+            css = client.get(moltbook_app.app_css.path)
+            revalidated = client.get(moltbook_app.app_css.path, headers={'If-None-Match': css.headers['etag']})
+
+        assert f'href="{moltbook_app.app_css.path}"' in page.text
+        assert 'box-sizing' not in page.text
+        assert css.headers['cache-control'] == f'public, max-age={moltbook_app.ASSET_MAX_AGE}, immutable'
+        assert css.headers['content-encoding'] == 'gzip'
+        assert css.text == moltbook_app.APP_CSS
+        assert revalidated.status_code == 304
+
+    def test_page_supports_etag_and_gzip(self, monkeypatch):
+        """An unchanged page should revalidate with 304; new output should change the ETag"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: '')
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            first = client.get('/')
+            again = client.get('/', headers={'If-None-Match': first.headers['etag']})
+            client.post('/execute', data={'command': 'help'})
+            changed = client.get('/', headers={'If-None-Match': first.headers['etag']})
+
+        assert first.headers['content-encoding'] == 'gzip'
+        assert first.headers['cache-control'] == 'no-cache'
+        assert again.status_code == 304 and again.content == b''
+        assert changed.status_code == 200
+        assert changed.headers['etag'] != first.headers['etag']
+
+    def test_static_sections_are_rendered_once(self, monkeypatch):
+        """Rendering the page should not rebuild the help section"""
+        from starlette.testclient import TestClient
+        calls = []
+        real_p = moltbook_app.P
+        monkeypatch.setattr(moltbook_app, 'P', lambda *a, **kw: calls.append(a) or real_p(*a, **kw))
+
+        with TestClient(moltbook_app.app) as client:
+            page = client.get('/')
+
+        assert calls == []
+        assert 'Available Commands' in page.text
+
+
+class TestStreaming:
+    """Tests for server-sent terminal updates"""
+
+    def test_streamed_execute_returns_job_id_immediately(self, monkeypatch):
+        """/execute with stream=1 should answer with a job id and run the command in the background"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            response = client.post('/execute', data={'command': 'help', 'stream': '1'})
+            assert response.status_code == 200
+            assert response.json()['job_id']
+
+            log = session_log(client)
+            for _ in range(200):
+                if any('Commands:' in e['text'] for e in log):
+                    break
+                client.portal.call(asyncio.sleep, 0.01)
+            assert any('Commands:' in e['text'] for e in log)
+
+    def test_events_replay_backlog_then_stream_live_lines(self):
+        """Subscribers should get missed lines, then each new line once, then resets"""
+        log = moltbook_app.OutputLog(capacity=10)
+        log.append({'text': 'before', 'style': 'info'})
+        log.append({'text': 'missed', 'style': 'info'})
+
+        async def run():
+            events = moltbook_app.terminal_events(log, since=1)
+            received = [await anext(events)]
+            log.append({'text': 'live', 'style': 'success'})
+            received.append(await anext(events))
+            log.clear()
+            received.append(await anext(events))
+            await events.aclose()
+            return received
+
+        missed, live, reset = asyncio.run(run())
+        assert missed.startswith('event: line\nid: 1\n') and 'missed' in missed
+        assert live.startswith('event: line\nid: 2\n') and 'live' in live
+        assert reset.startswith('event: reset')
+        assert not log.listeners
+
+    def test_stale_subscriber_starts_with_reset(self):
+        """A subscriber without a usable seq should first receive the whole terminal"""
+        log = moltbook_app.OutputLog(capacity=2)
+        for i in range(5):
+            log.append({'text': f'line {i}', 'style': 'info'})
+
+        async def run():
+            events = moltbook_app.terminal_events(log, since=0)
+            first = await anext(events)
+            await events.aclose()
+            return first
+
+        first = asyncio.run(run())
+        assert first.startswith('event: reset\nid: 4\n')
+        assert 'line 3' in first and 'line 4' in first and 'line 2' not in first
+
+
+class TestFeedPaging:
+    """Tests for the prefetching feed paginator and 'feed more'"""
+
+    @pytest.fixture
+    def fake_api(self, monkeypatch):
+        from fake_api import FakeMoltbook
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+        fake = FakeMoltbook(num_posts=25)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+        yield fake
+        fake.stop()
+
+    def test_pages_follow_next_offset_and_prefetch(self, fake_api):
+        """Each page should be requested once, the next one before it is asked for"""
+        async def run():
+            pages = moltbook_app.feed_pages('key', 'new', 10)
+            first = await anext(pages)
+            await asyncio.sleep(0.2)
+            prefetched = fake_api.request_count
+            rest = [page async for page in pages]
+            await moltbook_app.aclose_async_clients()
+            return first, prefetched, rest
+
+        first, prefetched, rest = asyncio.run(run())
+        assert prefetched == 2
+        assert [len(p['posts']) for p in [first] + rest] == [10, 10, 5]
+        assert first['posts'][0]['title'] == 'Post number 0'
+        assert rest[0]['posts'][0]['title'] == 'Post number 10'
+        assert fake_api.request_count == 3
+
+    def test_feed_more_continues_from_cursor(self, fake_api, monkeypatch):
+        """'feed more' should show the page after the previous one for this session"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            client.post('/execute', data={'command': 'feed new 10'})
+            client.post('/execute', data={'command': 'feed more'})
+            client.post('/execute', data={'command': 'feed more'})
+            client.post('/execute', data={'command': 'feed more'})
+            texts = [e['text'] for e in session_log(client)]
+
+        titles = [t for t in texts if t.startswith('[')]
+        assert len(titles) == 25
+        assert titles[10].endswith('Post number 10')
+        assert texts[-1] == 'End of feed.'
+
+    def test_feed_more_without_cursor(self, monkeypatch):
+        """'feed more' before any feed should explain what to do"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        from starlette.testclient import TestClient
+        client = TestClient(moltbook_app.app)
+
+        client.post('/execute', data={'command': 'feed more'})
+
+        assert any('No feed open' in e['text'] for e in session_log(client))
+
+
+class TestBatch:
+    """Tests for concurrent batch execution"""
+
+    @pytest.fixture
+    def fake_api(self, monkeypatch):
+        from fake_api import FakeMoltbook
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+        fake = FakeMoltbook(latency=0.1, num_posts=10)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        yield fake
+        fake.stop()
+
+    def test_split_batch(self):
+        """Commands split on newlines, or on ';' when given on one line"""
+        assert moltbook_app.split_batch("upvote a; upvote b ;") == ['upvote a', 'upvote b']
+        assert moltbook_app.split_batch("post general T | x; y\nupvote a") == ['post general T | x; y', 'upvote a']
+
+    def test_batch_runs_concurrently_with_ordered_output(self, fake_api):
+        """Wall time should be near one call, output in command order, failures reported"""
+        ids = [p['id'] for p in fake_api.posts[:8]]
+        commands = [f'upvote {i}' for i in ids] + ['upvote missing-post']
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            response = client.post('/batch', json={'commands': commands})
+            body = response.json()
+            texts = [e['text'] for e in session_log(client)]
+
+        assert body['seconds'] < 0.1 * len(commands) / 2
+        assert [r['command'] for r in body['results']] == commands
+        assert [r['ok'] for r in body['results']] == [True] * 8 + [False]
+        echoes = [t for t in texts if t.startswith('> ')]
+        assert echoes == [f'> {c}' for c in commands]
+        assert texts[-2] == 'Batch: 8/9 succeeded in ' + texts[-2].split(' in ')[1]
+        assert all(p['upvotes'] == 1 for p in fake_api.posts[:8])
+
+    def test_stateful_commands_run_alone_in_order(self, fake_api):
+        """A 'feed' in a batch should finish before the 'feed more' after it starts"""
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            client.post('/execute', data={'command': 'batch feed new 5; feed more'})
+            titles = [e['text'] for e in session_log(client) if e['text'].startswith('[')]
+
+        assert [t.split('] ')[1] for t in titles] == [f'Post number {i}' for i in range(10)]
+
+    def test_batch_endpoint_validates_body(self):
+        """Malformed JSON bodies should be rejected"""
+        from starlette.testclient import TestClient
+        client = TestClient(moltbook_app.app)
+
+        response = client.post('/batch', json={'commands': 'upvote a'})
+
+        assert response.status_code == 400
+
+
+class TestWriteScheduler:
+    """Tests for client-side pacing of writes"""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Fake monotonic clock that time.sleep advances"""
+        now = [1000.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        monkeypatch.setattr(moltbook_app.time, 'monotonic', lambda: now[0])
+        monkeypatch.setattr(moltbook_app.time, 'sleep', sleep)
+        moltbook_app.write_scheduler.clear()
+        return sleeps
+
+    def _ok(self):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'success': True}
+        return response
+
+    def test_endpoint_classes(self):
+        """Writes should be bucketed by what they do"""
+        assert moltbook_app.write_class('/posts') == 'post'
+        assert moltbook_app.write_class('/posts/abc/comments') == 'comment'
+        assert moltbook_app.write_class('/posts/abc/upvote') == 'vote'
+        assert moltbook_app.write_class('/agents/bob/follow') == 'follow'
+        assert moltbook_app.write_class('/agents/register') == 'write'
+
+    def test_burst_then_paced(self, clock):
+        """Votes beyond the burst should wait one interval each, in order"""
+        with mock.patch('app.requests.Session.request', return_value=self._ok()):
+            for _ in range(12):
+                moltbook_app.moltbook_request('POST', '/posts/p/upvote', 'key')
+
+        assert clock == [1.0, 1.0]
+
+    def test_buckets_are_per_key_and_class(self, clock):
+        """Another key or another kind of write should not be held back"""
+        with mock.patch('app.requests.Session.request', return_value=self._ok()):
+            moltbook_app.moltbook_request('POST', '/posts', 'key', {'title': 'a'})
+            moltbook_app.moltbook_request('POST', '/posts', 'other', {'title': 'b'})
+            moltbook_app.moltbook_request('POST', '/posts/p/upvote', 'key')
+
+        assert clock == []
+
+    def test_refuses_writes_queued_too_far_out(self, clock):
+        """A second post inside the 30 minute window should be refused, not queued"""
+        with mock.patch('app.requests.Session.request', return_value=self._ok()) as mock_request:
+            moltbook_app.moltbook_request('POST', '/posts', 'key', {'title': 'a'})
+            result = moltbook_app.moltbook_request('POST', '/posts', 'key', {'title': 'b'})
+
+        assert mock_request.call_count == 1
+        assert result['error'].startswith('Rate limited: next post slot in 1800s')
+        assert clock == []
+
+    def test_429_pauses_the_bucket(self, clock, monkeypatch):
+        """A 429 should hold back other writes of that class for Retry-After"""
+        limited = MagicMock(status_code=429, headers={'Retry-After': '5'})
+        slots = []
+        monkeypatch.setattr(moltbook_app.time, 'sleep',
+                            lambda s: slots.append(moltbook_app.write_scheduler.next_slot('key', '/agents/ann/follow')))
+        with mock.patch('app.requests.Session.request', side_effect=[limited, self._ok()]):
+            moltbook_app.moltbook_request('POST', '/agents/bob/follow', 'key')
+
+        assert slots == [5.0]
+        assert moltbook_app.write_scheduler.next_slot('key', '/posts/p/upvote') == 0
+
+    def test_queue_command(self, clock, monkeypatch):
+        """Should list per-class queue state for the current key"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        moltbook_app.write_scheduler.reserve('test_key', '/posts')
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            client.post('/execute', data={'command': 'queue'})
+            texts = [e['text'] for e in session_log(client)]
+
+        assert any(t.startswith('post: 0 queued') and 'next slot in 1800.0s' in t for t in texts)
+
+
+class TestLocalMirror:
+    """Tests for the SQLite mirror and offline search"""
+
+    def _post(self, id, title, content='', upvotes=0):
+        return {'id': id, 'title': title, 'content': content, 'upvotes': upvotes,
+                'created_at': f'2026-01-01T00:00:{id[-2:]}Z',
+                'author': {'id': 'a1', 'name': 'ann'}, 'submolt': {'id': 's1', 'name': 'general'}}
+
+    def test_ingest_upserts_without_losing_fields(self, local_mirror):
+        """A sparse search hit should refresh a post without blanking its other columns"""
+        local_mirror.ingest({'success': True, 'posts': [self._post('p01', 'Tide pools', 'crabs everywhere')]})
+        local_mirror.ingest({'success': True, 'results': [{'type': 'post', 'id': 'p01', 'title': 'Tide pools!',
+                                                           'similarity': 0.9}]})
+
+        post = local_mirror.recent_posts()[0]
+        assert (post['title'], post['content'], post['author'], post['submolt']) == \
+            ('Tide pools!', 'crabs everywhere', 'ann', 'general')
+        assert local_mirror.stats() == {'posts': 1, 'comments': 0, 'agents': 1, 'submolts': 1}
+
+    def test_search_ranks_title_matches_first(self, local_mirror):
+        """bm25 should weight the title over the body, and reindex on update"""
+        local_mirror.ingest({'success': True, 'posts': [
+            self._post('p01', 'Thoughts on memory', 'nothing about shells'),
+            self._post('p02', 'Shells and molting', 'a post about shells'),
+        ]})
+        local_mirror.ingest({'success': True, 'comment': {'id': 'c1', 'post_id': 'p01', 'content': 'I love shell games',
+                                                          'author': {'name': 'bob'}}})
+
+        hits = local_mirror.search('shell')
+        assert [(h['type'], h['id']) for h in hits] == [('post', 'p02'), ('post', 'p01'), ('comment', 'c1')]
+
+        local_mirror.ingest({'success': True, 'post': self._post('p02', 'Renamed', 'nothing here')})
+        assert [h['id'] for h in local_mirror.search('molting')] == []
+
+    def test_search_tolerates_fts_syntax(self, local_mirror):
+        """Quotes and operators in user input should not raise"""
+        local_mirror.ingest({'success': True, 'posts': [self._post('p01', 'AND "quoted" NEAR(x)')]})
+        assert [h['id'] for h in local_mirror.search('"quoted" AND')] == ['p01']
+        assert local_mirror.search('   ') == []
+
+    def test_fetched_posts_are_mirrored_and_searchable_offline(self, monkeypatch):
+        """Posts seen in a feed should be found by 'search --local' with the API down"""
+        from fake_api import FakeMoltbook
+        from starlette.testclient import TestClient
+        moltbook_app.response_cache.clear()
+        fake = FakeMoltbook(num_posts=5)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        try:
+            with TestClient(moltbook_app.app) as client:
+                client.post('/execute', data={'command': 'feed new 5'})
+                fake.stop()
+                requests_before = fake.request_count
+                client.post('/execute', data={'command': 'search --local number 3'})
+                texts = [e['text'] for e in session_log(client)]
+        finally:
+            fake.stop()
+
+        assert fake.request_count == requests_before
+        assert any(t.startswith('[post ') and t.endswith('Post number 3') for t in texts)
+        assert texts[-1].startswith('1 local result(s) in ')
+
+
+class TestFeedSync:
+    """Tests for incremental background sync"""
+
+    @pytest.fixture
+    def fake_api(self, monkeypatch):
+        from fake_api import FakeMoltbook
+        fake = FakeMoltbook(num_posts=60)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+        yield fake
+        fake.stop()
+
+    def test_pages_only_down_to_the_watermark(self, fake_api, local_mirror):
+        """Later polls should fetch just the new posts, in as few calls as possible"""
+        sync = moltbook_app.FeedSync()
+
+        async def run():
+            first = await sync.poll('key')
+            calls = sync.api_calls
+            idle = await sync.poll('key')
+            idle_calls = sync.api_calls - calls
+            for i in range(30):
+                fake_api.add_post('bob', 'general', f'Fresh {i}')
+            fresh = await sync.poll('key')
+            await moltbook_app.aclose_async_clients()
+            return first, idle, idle_calls, fresh, sync.api_calls - calls - idle_calls
+
+        first, idle, idle_calls, fresh, fresh_calls = asyncio.run(run())
+
+        assert first == moltbook_app.SYNC_PAGE_SIZE
+        assert (idle, idle_calls) == (0, 1)
+        assert (fresh, fresh_calls) == (30, 2)
+        assert local_mirror.stats()['posts'] == moltbook_app.SYNC_PAGE_SIZE + 30
+        assert local_mirror.recent_posts(1)[0]['title'] == 'Fresh 29'
+
+    def test_interval_adapts_to_activity(self, fake_api):
+        """Quiet polls should back off, busy ones speed up, failures back off"""
+        sync = moltbook_app.FeedSync()
+
+        async def run():
+            await sync.poll('key')
+            await sync.poll('key')
+            quiet = sync.interval
+            fake_api.add_post('bob', 'general', 'Fresh')
+            await sync.poll('key')
+            busy = sync.interval
+            fake_api.stop()
+            failed = await sync.poll('key')
+            await moltbook_app.aclose_async_clients()
+            return quiet, busy, failed
+
+        quiet, busy, failed = asyncio.run(run())
+
+        assert quiet > moltbook_app.SYNC_MIN_INTERVAL
+        assert busy < quiet
+        assert failed is None and sync.interval == busy * 2 and sync.last_error
+
+    def test_sync_status_command(self, fake_api, monkeypatch):
+        """'sync status' should report lag and throughput"""
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        monkeypatch.setattr(moltbook_app, 'feed_sync', moltbook_app.FeedSync())
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            client.post('/execute', data={'command': 'sync now'})
+            client.post('/execute', data={'command': 'sync status'})
+            texts = [e['text'] for e in session_log(client)]
+
+        assert f'Synced {moltbook_app.SYNC_PAGE_SIZE} new post(s).' in texts
+        assert any(t.startswith('Lag: 0s since last sync, newest post') for t in texts)
+        assert any(t.startswith(f'Ingested {moltbook_app.SYNC_PAGE_SIZE} posts in 1 API calls over 1 polls') for t in texts)
+
+
+class TestOutbox:
+    """Tests for the durable outbox of posts and comments"""
+
+    @pytest.fixture
+    def fake_api(self, monkeypatch):
+        from fake_api import FakeMoltbook
+        moltbook_app.response_cache.clear()
+        moltbook_app.write_scheduler.clear()
+        fake = FakeMoltbook(latency=0.2, num_posts=3)
+        monkeypatch.setattr(moltbook_app, 'API_BASE', fake.start())
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
+        yield fake
+        fake.stop()
+
+    def _wait_for(self, predicate, timeout=5):
+        import time
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            assert time.monotonic() < deadline, 'timed out'
+            time.sleep(0.02)
+
+    def test_create_post_returns_once_journaled(self, fake_api):
+        """The form should answer before the upstream call and the drainer should send it"""
+        import time
+        from starlette.testclient import TestClient
+
+        with TestClient(moltbook_app.app) as client:
+            start = time.perf_counter()
+            client.post('/create-post', data={'submolt': 'general', 'title': 'Hello', 'content': 'World'})
+            elapsed = time.perf_counter() - start
+            self._wait_for(lambda: fake_api.posts[0]['title'] == 'Hello')
+            self._wait_for(lambda: any(e['text'].startswith('Post created! ID:') for e in session_log(client)))
+            texts = [e['text'] for e in session_log(client)]
+
+        assert elapsed < fake_api.latency
+        assert "Queued post 'Hello' in m/general as outbox #1; it will be sent in the background." in texts
+        assert moltbook_app.outbox.get(1)['state'] == 'sent'
+
+    def test_failed_sends_back_off_and_resume_after_restart(self, fake_api):
+        """Unsent writes should stay journaled with a later retry, and survive a new Outbox on the same file"""
+        fake_api.stop()
+        entry = moltbook_app.outbox.add('test_key', 'POST', '/posts/p1/comments', {'content': 'hi'}, 'comment', 'comment on p1')
+
+        sent = asyncio.run(moltbook_app.drain_outbox())
+        asyncio.run(moltbook_app.aclose_async_clients())
+
+        saved = moltbook_app.outbox.get(entry['id'])
+        assert sent == 0
+        assert (saved['state'], saved['attempts']) == ('pending', 1)
+        assert saved['last_error']
+
+        moltbook_app.outbox.claim_due(now=saved['next_attempt'])  # crash while sending
+        moltbook_app.outbox.close()
+        reopened = moltbook_app.Outbox(moltbook_app.outbox.path)
+        assert reopened.recover() == 1
+        assert reopened.get(entry['id'])['state'] == 'pending'
+        reopened.close()
+
+    def test_idempotency_key_prevents_duplicates(self, fake_api):
+        """Resending an entry that did reach the server should not post twice"""
+        entry = moltbook_app.outbox.add('test_key', 'POST', '/posts', {'submolt': 'general', 'title': 'Once'}, 'post', 'post')
+
+        async def send_twice():
+            await moltbook_app.send_outbox_entry(entry)
+            moltbook_app.write_scheduler.clear()
+            await moltbook_app.send_outbox_entry(entry)
+            await moltbook_app.aclose_async_clients()
+
+        asyncio.run(send_twice())
+
+        assert [p['title'] for p in fake_api.posts].count('Once') == 1
+
+    def test_outbox_command_lists_retries_and_drops(self, fake_api):
+        """'outbox' should show unsent entries; retry and drop should act on them"""
+        from starlette.testclient import TestClient
+        first = moltbook_app.outbox.add('test_key', 'POST', '/posts', {'title': 'A'}, 'post', "post 'A'")
+        second = moltbook_app.outbox.add('test_key', 'POST', '/posts', {'title': 'B'}, 'post', "post 'B'")
+        moltbook_app.outbox.claim_due()
+        moltbook_app.outbox.mark_failed(first['id'], 'boom', 8)
+        moltbook_app.outbox.mark_retry(second['id'], 'slow', 600, 1)
+
+        with TestClient(moltbook_app.app) as client:
+            client.post('/execute', data={'command': 'outbox'})
+            client.post('/execute', data={'command': f"outbox drop {second['id']}"})
+            client.post('/execute', data={'command': f"outbox retry {first['id']}"})
+            self._wait_for(lambda: moltbook_app.outbox.get(first['id'])['state'] == 'sent')
+            client.post('/execute', data={'command': f"outbox drop {first['id']}"})
+            texts = [e['text'] for e in session_log(client)]
+
+        assert "#1 failed: post 'A' (attempts: 8)" in texts
+        assert any(t.startswith("#2 pending: post 'B' (attempts: 1), next try in ") for t in texts)
+        assert 'Dropped outbox #2.' in texts
+        assert 'Outbox #1 will be sent again now.' in texts
+        assert 'No unsent outbox entry #1.' in texts
+        assert moltbook_app.outbox.get(second['id'])['state'] == 'dropped'
+
+
+class TestHistory:
+    """Tests for the persistent terminal history"""
+
+    def _entry(self, text):
+        return {'text': text, 'style': 'info', 'time': '2026-01-01T00:00:00'}
+
+    def test_rotates_segments_and_reads_tail_across_them(self, tmp_path):
+        """Numbering should continue across segments and reopening, and the tail should span segments"""
+        history = moltbook_app.History(str(tmp_path / 'h'), segment_bytes=1024)
+        for i in range(100):
+            history.append(self._entry(f'line {i}'), 'a' if i % 2 else 'b')
+        history.close()
+
+        reopened = moltbook_app.History(str(tmp_path / 'h'), segment_bytes=1024)
+        assert reopened.append(self._entry('line 100')) == 100
+        assert len(reopened.segments()) > 3
+        assert [r['text'] for r in reopened.tail(3)] == ['line 98', 'line 99', 'line 100']
+        assert [r['n'] for r in reopened.tail(2, sid='a')] == [97, 99]
+        reopened.close()
+
+    def test_reading_stops_early(self, tmp_path, monkeypatch):
+        """A short tail should only open the newest segment"""
+        history = moltbook_app.History(str(tmp_path / 'h'), segment_bytes=1024)
+        for i in range(200):
+            history.append(self._entry(f'line {i}'))
+        opened = []
+        real_reverse_lines = moltbook_app.reverse_lines
+        monkeypatch.setattr(moltbook_app, 'reverse_lines', lambda path: opened.append(path) or real_reverse_lines(path))
+
+        history.tail(2)
+
+        assert opened == [history.segments()[-1][1]]
+        history.close()
+
+    def test_grep_and_partial_lines(self, tmp_path):
+        """grep should return the newest matches oldest first and skip a torn final line"""
+        history = moltbook_app.History(str(tmp_path / 'h'))
+        for i in range(10):
+            history.append(self._entry(f'Post ID: {i}' if i % 3 == 0 else f'noise {i}'))
+        history.close()
+        with open(history.segments()[-1][1], 'ab') as f:
+            f.write(b'{"n": 10, "text": "Post ID: tor')
+
+        assert [r['text'] for r in history.grep('post id', limit=2)] == ['Post ID: 6', 'Post ID: 9']
+        assert [r['text'] for r in history.grep('[unclosed')] == []
+        assert moltbook_app.History(history.path).tail(1)[0]['text'] == 'Post ID: 9'
+
+    def test_terminal_is_restored_after_restart(self, monkeypatch):
+        """A browser coming back after a restart should see its own recent lines, and only those"""
+        from starlette.testclient import TestClient
+        monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: '')
+
+        client, other = TestClient(moltbook_app.app), TestClient(moltbook_app.app)
+        with client:
+            client.post('/execute', data={'command': 'status'})
+        with other:
+            other.post('/execute', data={'command': 'me'})
+        monkeypatch.setattr(moltbook_app, 'session_logs', moltbook_app.SessionLogs())
+        with client:
+            restored = [e['text'] for e in session_log(client)]
+            client.post('/execute', data={'command': 'history grep ^> '})
+            texts = [e['text'] for e in session_log(client)]
+
+        assert restored == ['> status', "No API key set. Use 'register' or set your key above."]
+        assert texts[-2].endswith('> history grep ^> ')
+        assert [t.split(maxsplit=2)[2] for t in texts[3:-1]] == ['> status', '> me', '> history grep ^> ']
+
+
+class TestCommandParsing:
+    """Tests for command parsing in execute endpoint"""
+
     def test_help_command(self, monkeypatch):
         """Should display help text"""
         monkeypatch.setattr(moltbook_app, 'load_api_key', lambda: 'test_key')
@@ -156,7 +1401,7 @@ class TestCommandParsing:
         response = client.post('/execute', data={'command': 'help'})
 
         assert response.status_code == 200
-        assert any('Commands:' in entry['text'] for entry in moltbook_app.output_log)
+        assert any('Commands:' in entry['text'] for entry in session_log(client))
 
     def test_empty_command_does_nothing(self, monkeypatch):
         """Should not add output for empty command"""
@@ -165,11 +1410,11 @@ class TestCommandParsing:
         from starlette.testclient import TestClient
         client = TestClient(moltbook_app.app)
 
-        initial_count = len(moltbook_app.output_log)
+        initial_count = len(session_log(client))
         response = client.post('/execute', data={'command': ''})
 
         assert response.status_code == 200
-        assert len(moltbook_app.output_log) == initial_count
+        assert len(session_log(client)) == initial_count
 
     def test_unknown_command_shows_error(self, monkeypatch):
         """Should show error for unknown command"""
@@ -181,7 +1426,7 @@ class TestCommandParsing:
         response = client.post('/execute', data={'command': 'unknowncmd123'})
 
         assert response.status_code == 200
-        assert any('Unknown command' in entry['text'] for entry in moltbook_app.output_log)
+        assert any('Unknown command' in entry['text'] for entry in session_log(client))
 
 
 @pytest.mark.integration
@@ -213,15 +1458,13 @@ class TestIntegration:
 
     def test_clear_endpoint(self):
         """Should clear the terminal output"""
-        moltbook_app.output_log.clear()
-        moltbook_app.add_output("Test entry", "info")
-
         from starlette.testclient import TestClient
         client = TestClient(moltbook_app.app)
+        session_log(client).append({'text': "Test entry", 'style': "info"})
 
         response = client.post('/clear')
 
         assert response.status_code == 200
         # After clear, only "Terminal cleared." should remain
-        assert len(moltbook_app.output_log) == 1
-        assert 'cleared' in moltbook_app.output_log[0]['text'].lower()
+        assert len(session_log(client)) == 1
+        assert 'cleared' in session_log(client)[0]['text'].lower()